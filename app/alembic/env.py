@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import pool
@@ -8,7 +9,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
 from app.core.config import settings
-from app.models import Base
+from app.models import Base, RefreshTokenModel
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -32,6 +33,21 @@ target_metadata = Base.metadata
 
 config.set_main_option("sqlalchemy.url", str(settings.db.url))
 
+# partitions of refresh_tokens are created and dropped by the app
+PARTITION_NAME = re.compile(
+    rf"^{RefreshTokenModel.__tablename__}_(p-?\d+|default)$"
+)
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table":
+        table_name = name
+    elif type_ in ("index", "unique_constraint", "foreign_key_constraint"):
+        table_name = object.table.name
+    else:
+        return True
+    return not (reflected and PARTITION_NAME.match(table_name))
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -51,6 +67,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -58,7 +75,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
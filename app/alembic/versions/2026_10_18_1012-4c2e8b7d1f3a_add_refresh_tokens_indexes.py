@@ -0,0 +1,42 @@
+"""add refresh_tokens indexes
+
+Revision ID: 4c2e8b7d1f3a
+Revises: 90783c096301
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c2e8b7d1f3a"
+down_revision: Union[str, None] = "90783c096301"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_refresh_tokens_token_hash"),
+        "refresh_tokens",
+        ["token_hash"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_refresh_tokens_user_id"),
+        "refresh_tokens",
+        ["user_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_refresh_tokens_user_id"), table_name="refresh_tokens"
+    )
+    op.drop_index(
+        op.f("ix_refresh_tokens_token_hash"), table_name="refresh_tokens"
+    )
@@ -0,0 +1,42 @@
+"""index refresh_tokens by user and age
+
+Revision ID: b7e19a2c5d40
+Revises: 4c2e8b7d1f3a
+Create Date: 2026-10-18 13:47:05.118264
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e19a2c5d40"
+down_revision: Union[str, None] = "4c2e8b7d1f3a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_refresh_tokens_user_id_created_at",
+        "refresh_tokens",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+    op.drop_index(
+        op.f("ix_refresh_tokens_user_id"), table_name="refresh_tokens"
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f("ix_refresh_tokens_user_id"),
+        "refresh_tokens",
+        ["user_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_refresh_tokens_user_id_created_at", table_name="refresh_tokens"
+    )
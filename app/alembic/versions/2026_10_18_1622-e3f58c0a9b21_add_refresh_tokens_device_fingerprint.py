@@ -0,0 +1,77 @@
+"""add refresh_tokens device_fingerprint
+
+Revision ID: e3f58c0a9b21
+Revises: b7e19a2c5d40
+Create Date: 2026-10-18 16:22:48.730551
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.schemas.device_info_schema import SDeviceInfo
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3f58c0a9b21"
+down_revision: Union[str, None] = "b7e19a2c5d40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _backfill_device_fingerprints() -> None:
+    conn = op.get_bind()
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, device_info FROM refresh_tokens "
+                "WHERE device_fingerprint IS NULL LIMIT :batch_size"
+            ),
+            {"batch_size": BACKFILL_BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            sa.text(
+                "UPDATE refresh_tokens SET device_fingerprint = :fingerprint "
+                "WHERE id = :id"
+            ),
+            [
+                {
+                    "id": row.id,
+                    "fingerprint": SDeviceInfo.model_validate(
+                        row.device_info
+                    ).fingerprint(),
+                }
+                for row in rows
+            ],
+        )
+
+
+def upgrade() -> None:
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("device_fingerprint", sa.LargeBinary(), nullable=True),
+    )
+    # every batch is committed on its own to keep the row locks short
+    with op.get_context().autocommit_block():
+        _backfill_device_fingerprints()
+    op.alter_column("refresh_tokens", "device_fingerprint", nullable=False)
+    op.create_index(
+        "ix_refresh_tokens_user_id_device_fingerprint",
+        "refresh_tokens",
+        ["user_id", "device_fingerprint"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_refresh_tokens_user_id_device_fingerprint",
+        table_name="refresh_tokens",
+    )
+    op.drop_column("refresh_tokens", "device_fingerprint")
@@ -0,0 +1,33 @@
+"""index refresh_tokens expires_at
+
+Revision ID: 5a6d2f81c3e7
+Revises: e3f58c0a9b21
+Create Date: 2026-10-18 17:55:12.604419
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a6d2f81c3e7"
+down_revision: Union[str, None] = "e3f58c0a9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_refresh_tokens_expires_at"),
+        "refresh_tokens",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_refresh_tokens_expires_at"), table_name="refresh_tokens"
+    )
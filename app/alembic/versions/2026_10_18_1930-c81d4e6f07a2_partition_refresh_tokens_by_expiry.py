@@ -0,0 +1,123 @@
+"""partition refresh_tokens by expiry
+
+Revision ID: c81d4e6f07a2
+Revises: 5a6d2f81c3e7
+Create Date: 2026-10-18 19:30:41.257930
+
+The layout is optional: the table is only converted when
+PARTITIONING__ENABLED is set at migration time. Expired tokens are not
+copied to the partitioned table.
+"""
+
+from datetime import datetime, UTC
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.db.partitions import create_range_partition_sql, partition_start
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c81d4e6f07a2"
+down_revision: Union[str, None] = "5a6d2f81c3e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SECS_IN_DAY = 60 * 60 * 24
+TABLE = "refresh_tokens"
+OLD_TABLE = "refresh_tokens_unpartitioned"
+COLUMNS = (
+    "id, user_id, token_hash, created_at, expires_at, device_info, "
+    "device_fingerprint"
+)
+INDEXES = {
+    "ix_refresh_tokens_token_hash": ["token_hash"],
+    "ix_refresh_tokens_user_id_created_at": ["user_id", "created_at"],
+    "ix_refresh_tokens_user_id_device_fingerprint": [
+        "user_id",
+        "device_fingerprint",
+    ],
+    "ix_refresh_tokens_expires_at": ["expires_at"],
+}
+
+
+def _is_partitioned() -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table))"
+            ),
+            {"table": TABLE},
+        )
+    )
+
+
+def _detach_old_table() -> None:
+    for index_name in INDEXES:
+        op.drop_index(index_name, table_name=TABLE)
+    op.rename_table(TABLE, OLD_TABLE)
+    op.execute(
+        f"ALTER TABLE {OLD_TABLE} "
+        f"RENAME CONSTRAINT pk_refresh_tokens TO pk_{OLD_TABLE}"
+    )
+
+
+def _create_table(partitioned: bool) -> None:
+    primary_key = ["id", "expires_at"] if partitioned else ["id"]
+    op.create_table(
+        TABLE,
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token_hash", sa.String(), nullable=False),
+        sa.Column("created_at", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.Integer(), nullable=False),
+        sa.Column("device_info", sa.JSON(), nullable=False),
+        sa.Column("device_fingerprint", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_refresh_tokens_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(*primary_key, name=op.f("pk_refresh_tokens")),
+        postgresql_partition_by="RANGE (expires_at)" if partitioned else None,
+    )
+    for index_name, columns in INDEXES.items():
+        op.create_index(index_name, TABLE, columns, unique=False)
+
+
+def upgrade() -> None:
+    if not settings.partitioning.enabled or _is_partitioned():
+        return
+    now = int(datetime.now(UTC).timestamp())
+    interval = settings.partitioning.interval_days * SECS_IN_DAY
+    horizon = (
+        now
+        + settings.auth.refresh_token_expires_days * SECS_IN_DAY
+        + settings.partitioning.premake * interval
+    )
+
+    _detach_old_table()
+    _create_table(partitioned=True)
+    for start in range(partition_start(now, interval), horizon, interval):
+        op.execute(create_range_partition_sql(TABLE, start, start + interval))
+    op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+    op.execute(
+        f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE} "
+        f"WHERE expires_at > {now}"
+    )
+    op.drop_table(OLD_TABLE)
+
+
+def downgrade() -> None:
+    if not _is_partitioned():
+        return
+    _detach_old_table()
+    _create_table(partitioned=False)
+    op.execute(
+        f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}"
+    )
+    op.drop_table(OLD_TABLE)
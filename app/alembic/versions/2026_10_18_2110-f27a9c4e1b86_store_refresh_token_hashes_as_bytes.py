@@ -0,0 +1,88 @@
+"""store refresh token hashes as bytes
+
+Revision ID: f27a9c4e1b86
+Revises: c81d4e6f07a2
+Create Date: 2026-10-18 21:10:12.604318
+
+The hex digests are copied to a new bytea column in small committed
+batches, the hash index is built next to the old one and only the final
+swap (catching up on rows written meanwhile) runs in one transaction.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f27a9c4e1b86"
+down_revision: Union[str, None] = "c81d4e6f07a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+TABLE = "refresh_tokens"
+INDEX = "ix_refresh_tokens_token_hash"
+NEW_INDEX = "ix_refresh_tokens_token_hash_new"
+
+
+def _is_partitioned() -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table))"
+            ),
+            {"table": TABLE},
+        )
+    )
+
+
+def _backfill(expression: str, limit: int | None) -> None:
+    batch = f"LIMIT {limit}" if limit else ""
+    statement = sa.text(
+        f"UPDATE {TABLE} SET token_hash_new = {expression} "
+        f"WHERE id IN (SELECT id FROM {TABLE} "
+        f"WHERE token_hash_new IS NULL {batch})"
+    )
+    conn = op.get_bind()
+    while conn.execute(statement).rowcount and limit:
+        pass
+
+
+def _migrate(column_type: sa.types.TypeEngine, expression: str, using: str):
+    op.add_column(
+        TABLE, sa.Column("token_hash_new", column_type, nullable=True)
+    )
+    # every batch is committed on its own to keep the row locks short
+    with op.get_context().autocommit_block():
+        _backfill(expression, BACKFILL_BATCH_SIZE)
+        # partitioned tables can't build indexes concurrently
+        if not _is_partitioned():
+            op.create_index(
+                NEW_INDEX,
+                TABLE,
+                ["token_hash_new"],
+                postgresql_using=using,
+                postgresql_concurrently=True,
+            )
+    if _is_partitioned():
+        op.create_index(
+            NEW_INDEX, TABLE, ["token_hash_new"], postgresql_using=using
+        )
+    _backfill(expression, None)
+    op.drop_index(INDEX, table_name=TABLE)
+    op.drop_column(TABLE, "token_hash")
+    op.alter_column(
+        TABLE, "token_hash_new", new_column_name="token_hash", nullable=False
+    )
+    op.execute(f"ALTER INDEX {NEW_INDEX} RENAME TO {INDEX}")
+
+
+def upgrade() -> None:
+    _migrate(sa.LargeBinary(), "decode(token_hash, 'hex')", "hash")
+
+
+def downgrade() -> None:
+    _migrate(sa.String(), "encode(token_hash, 'hex')", "btree")
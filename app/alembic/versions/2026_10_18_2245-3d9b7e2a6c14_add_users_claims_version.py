@@ -0,0 +1,35 @@
+"""add users claims_version
+
+Revision ID: 3d9b7e2a6c14
+Revises: f27a9c4e1b86
+Create Date: 2026-10-18 22:45:31.207914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3d9b7e2a6c14"
+down_revision: Union[str, None] = "f27a9c4e1b86"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "claims_version",
+            sa.Integer(),
+            server_default="1",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "claims_version")
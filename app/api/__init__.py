@@ -1,6 +1,8 @@
 from .v1 import router_v1
+from .well_known_route import router as well_known_router
 
 
 __all__ = [
     "router_v1",
+    "well_known_router",
 ]
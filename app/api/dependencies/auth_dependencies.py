@@ -3,22 +3,43 @@ from jwt import InvalidTokenError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 
+from app.core.admission import AdmissionController
+from app.core.config import settings
+from app.exceptions.admission_exceptions import AdmissionRejected
 from app.services.auth_service import (
-    verify_password,
-    decode_refresh_token,
-    decode_access_token,
+    verify_password_async,
+    hash_password_async,
+    password_needs_rehash,
+    decode_refresh_token_async,
+    decode_access_token_async,
+    user_claims_are_current,
 )
 from app.db import get_db_session
 from app.models import UserModel
 from app.schemas.device_info_schema import SDeviceInfo
-from app.services.refresh_token_service import check_token_in_db
-from app.services.user_service import get_user_by_username
+from app.schemas.user_schemas import SUserClaims
+from app.services.access_token_denylist_service import is_access_token_revoked
+from app.services.refresh_token_service import (
+    check_token_in_db,
+    get_refresh_token_payload_from_db,
+)
+from app.services.user_service import (
+    get_user_by_username,
+    update_user_password,
+)
 from app.api.exceptions.auth_exceptions import (
     InvalidCredentialsError,
     TokenNotFoundError,
     InvalidTokenException,
     UserNotFoundError,
     UserInactiveError,
+    LoginOverloadedError,
+)
+
+login_admission = AdmissionController(
+    max_in_flight=settings.login_admission.max_in_flight,
+    max_queued=settings.login_admission.max_queued,
+    max_queue_wait=settings.login_admission.max_queue_wait_sec,
 )
 
 
@@ -27,30 +48,53 @@ async def validate_credentials(
     password: str = Form(),
     db_session: AsyncSession = Depends(get_db_session)
 ) -> UserModel:
-    user = await get_user_by_username(username, db_session)
-    if not user:
-        raise InvalidCredentialsError()
-    if not verify_password(password, user.password):
-        raise InvalidCredentialsError()
+    try:
+        async with login_admission.admit():
+            user = await get_user_by_username(username, db_session)
+            if not user:
+                raise InvalidCredentialsError()
+            if not await verify_password_async(password, user.password):
+                raise InvalidCredentialsError()
+            if password_needs_rehash(user.password):
+                new_password = await hash_password_async(password)
+                await update_user_password(user.id, new_password, db_session)
+    except AdmissionRejected:
+        raise LoginOverloadedError(settings.login_admission.retry_after_sec)
     return user
 
 
+def _get_refresh_token(request: Request) -> str:
+    if not (refresh_token := request.cookies.get("refresh_token")):
+        raise TokenNotFoundError()
+    return refresh_token
+
+
 async def validate_refresh_token(
     request: Request,
     db_session: AsyncSession = Depends(get_db_session),
 ) -> str:
-    if not (refresh_token := request.cookies.get("refresh_token")):
-        raise TokenNotFoundError()
+    refresh_token = _get_refresh_token(request)
     if not await check_token_in_db(db_session, refresh_token):
         raise InvalidTokenException()
     return refresh_token
 
 
 async def get_valid_refresh_token_payload(
-    refresh_token: str = Depends(validate_refresh_token),
+    request: Request,
+    db_session: AsyncSession = Depends(get_db_session),
 ) -> dict:
+    if settings.auth.refresh_token_mode == "opaque":
+        payload = await get_refresh_token_payload_from_db(
+            db_session,
+            _get_refresh_token(request),
+        )
+        if payload is None:
+            raise InvalidTokenException()
+        return payload
+
+    refresh_token = await validate_refresh_token(request, db_session)
     try:
-        payload = decode_refresh_token(refresh_token)
+        payload = await decode_refresh_token_async(refresh_token)
     except InvalidTokenError:
         raise InvalidTokenException()
     return payload
@@ -60,16 +104,26 @@ async def get_access_token_payload(request: Request) -> dict:
     if not (access_token := request.cookies.get("access_token")):
         raise TokenNotFoundError()
     try:
-        payload = decode_access_token(access_token)
+        payload = await decode_access_token_async(access_token)
     except InvalidTokenError:
         raise InvalidTokenException()
+    if is_access_token_revoked(payload):
+        raise InvalidTokenException()
     return payload
 
 
 async def get_auth_user_info(
     payload: dict = Depends(get_access_token_payload),
     db_session: AsyncSession = Depends(get_db_session),
-):
+) -> UserModel | SUserClaims:
+    if user_claims_are_current(payload):
+        # the session is never used, so no connection is checked out
+        return SUserClaims(
+            id=payload["uid"],
+            username=payload["sub"],
+            email=payload["email"],
+            active=payload["active"],
+        )
     username = payload.get("sub")
     if username:
         user = await get_user_by_username(username, db_session)
@@ -79,8 +133,8 @@ async def get_auth_user_info(
 
 
 async def get_active_auth_user_info(
-    user: UserModel = Depends(get_auth_user_info),
-):
+    user: UserModel | SUserClaims = Depends(get_auth_user_info),
+) -> UserModel | SUserClaims:
     if user.active:
         return user
     raise UserInactiveError()
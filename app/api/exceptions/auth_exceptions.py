@@ -55,3 +55,12 @@ class EmailAlreadyExistsError(HTTPException):
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already exists.",
         )
+
+
+class LoginOverloadedError(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress. Try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
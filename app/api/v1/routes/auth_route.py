@@ -1,3 +1,6 @@
+import asyncio
+import uuid
+
 from fastapi import (
     APIRouter,
     Depends,
@@ -5,6 +8,7 @@ from fastapi import (
     Response,
     Request,
 )
+from jwt import InvalidTokenError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies.auth_dependencies import (
@@ -16,23 +20,33 @@ from app.api.dependencies.auth_dependencies import (
 from app.api.exceptions.auth_exceptions import (
     UsernameAlreadyExistsError,
     EmailAlreadyExistsError,
+    UserNotFoundError,
 )
 from app.services.auth_service import (
-    hash_password,
-    create_access_token,
-    create_refresh_token,
+    hash_password_async,
+    build_access_token_payload,
+    decode_access_token_async,
+    issue_access_token,
+    issue_refresh_token,
     get_token_iat_and_exp,
+    invalidate_access_token,
     TokenType,
 )
+from app.core.config import settings
 from app.db import get_db_session
 from app.exceptions.user_exceptions import UsernameAlreadyExists, EmailAlreadyExists
 from app.models import UserModel
 from app.schemas.device_info_schema import SDeviceInfo
-from app.schemas.user_schemas import SUserSignUp, SUserShortInfo
+from app.schemas.user_schemas import (
+    SUserClaims,
+    SUserSignUp,
+    SUserShortInfo,
+)
+from app.services.access_token_denylist_service import revoke_access_token
 from app.services.refresh_token_service import (
     add_refresh_token_to_db, delete_refresh_token_from_db,
 )
-from app.services.user_service import create_user
+from app.services.user_service import create_user, get_user_by_username
 
 router = APIRouter()
 
@@ -50,15 +64,19 @@ async def login(
     payload = {"sub": user.username}
     access_token_iat_exp = get_token_iat_and_exp(TokenType.ACCESS)
     refresh_token_iat_exp = get_token_iat_and_exp(TokenType.REFRESH)
-    access_token = create_access_token(
-        payload=payload,
-        iat=access_token_iat_exp["iat"],
-        expire=access_token_iat_exp["exp"],
-    )
-    refresh_token = create_refresh_token(
-        payload,
-        iat=refresh_token_iat_exp["iat"],
-        expire=refresh_token_iat_exp["exp"],
+    session_id = uuid.uuid4()
+    access_token, refresh_token = await asyncio.gather(
+        issue_access_token(
+            payload=build_access_token_payload(user),
+            iat=access_token_iat_exp["iat"],
+            expire=access_token_iat_exp["exp"],
+        ),
+        issue_refresh_token(
+            payload,
+            iat=refresh_token_iat_exp["iat"],
+            expire=refresh_token_iat_exp["exp"],
+            session_id=session_id,
+        ),
     )
     await add_refresh_token_to_db(
         db_session,
@@ -67,6 +85,7 @@ async def login(
         refresh_token_iat_exp["iat"],
         refresh_token_iat_exp["exp"],
         device_info,
+        session_id,
     )
     response.set_cookie(
         key="access_token",
@@ -95,7 +114,7 @@ async def sign_up_user(
     user: SUserSignUp,
     db_session: AsyncSession = Depends(get_db_session),
 ) -> SUserShortInfo:
-    user.password = hash_password(user.password.decode())
+    user.password = await hash_password_async(user.password.decode())
     try:
         user_from_db = await create_user(user, db_session)
     except UsernameAlreadyExists:
@@ -112,10 +131,18 @@ async def sign_up_user(
 async def refresh_access_token(
     response: Response,
     payload: dict = Depends(get_valid_refresh_token_payload),
+    db_session: AsyncSession = Depends(get_db_session),
 ):
-    access_token_payload = {"sub": payload.get("sub")}
+    if not (username := payload.get("sub")):
+        raise UserNotFoundError()
+    access_token_payload = {"sub": username}
+    if settings.auth.embed_user_claims:
+        user = await get_user_by_username(username, db_session)
+        if user is None:
+            raise UserNotFoundError()
+        access_token_payload = build_access_token_payload(user)
     access_token_iat_exp = get_token_iat_and_exp(TokenType.ACCESS)
-    access_token = create_access_token(
+    access_token = await issue_access_token(
         payload=access_token_payload,
         iat=access_token_iat_exp["iat"],
         expire=access_token_iat_exp["exp"],
@@ -143,6 +170,16 @@ async def logout(
     refresh_token = request.cookies.get("refresh_token")
     if refresh_token:
         await delete_refresh_token_from_db(db_session, refresh_token)
+    if access_token := request.cookies.get("access_token"):
+        try:
+            access_token_payload = await decode_access_token_async(
+                access_token
+            )
+        except InvalidTokenError:
+            pass
+        else:
+            await revoke_access_token(db_session, access_token_payload)
+        invalidate_access_token(access_token)
     response.delete_cookie(key="refresh_token")
     response.delete_cookie(key="access_token")
     return {
@@ -155,6 +192,6 @@ async def logout(
     summary="Get current user info",
 )
 async def auth_user_get_info(
-    user: UserModel = Depends(get_active_auth_user_info),
+    user: UserModel | SUserClaims = Depends(get_active_auth_user_info),
 ) -> SUserShortInfo:
     return SUserShortInfo.model_validate(user)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Request, Response, status
+
+from app.core.config import settings
+from app.services.jwt_key_service import jwt_key_provider
+
+router = APIRouter()
+
+
+@router.get(
+    "/.well-known/jwks.json",
+    summary="Get public keys for access token verification",
+)
+async def get_jwks(request: Request) -> Response:
+    jwks_body, etag = jwt_key_provider.get_jwks()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.auth.jwks_max_age_sec}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=headers,
+        )
+    return Response(
+        content=jwks_body,
+        media_type="application/json",
+        headers=headers,
+    )
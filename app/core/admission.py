@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.exceptions.admission_exceptions import AdmissionRejected
+
+
+class AdmissionController:
+    """
+    Limits the number of concurrently running expensive operations.
+    Requests above `max_in_flight` wait in a bounded FIFO queue for at
+    most `max_queue_wait` seconds, everything beyond that is shed.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queued: int,
+        max_queue_wait: float,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queued or self.max_queue_wait <= 0:
+            self.shed += 1
+            raise AdmissionRejected()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.max_queue_wait)
+        except TimeoutError:
+            self._abandon(waiter)
+            self.shed += 1
+            raise AdmissionRejected()
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admitted += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        elif waiter.done() and not waiter.cancelled():
+            # The slot was handed over right as we stopped waiting.
+            self.release()
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+        }
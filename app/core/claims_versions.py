@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Callable, Hashable
+
+
+class ClaimsVersions:
+    """
+    The latest claims version of recently changed users. A token carries
+    the version it was issued with and is stale once a newer one is known.
+    Entries live only as long as tokens issued before the change, so users
+    that did not change lately take no memory. After `reset` (e.g. when
+    changes may have been missed) every token issued before is stale.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.ttl = ttl
+        self.clock = clock
+        self.trusted_since = 0
+        self._versions: dict[Hashable, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, key: Hashable, version: int) -> None:
+        now = self.clock()
+        with self._lock:
+            self._purge(now)
+            known = self._versions.get(key)
+            if known is not None and known[0] > version:
+                version = known[0]
+            self._versions[key] = (version, now + self.ttl)
+
+    def is_current(
+        self,
+        key: Hashable,
+        version: int,
+        issued_at: float,
+    ) -> bool:
+        if issued_at < self.trusted_since:
+            return False
+        known = self._versions.get(key)
+        return (
+            known is None
+            or version >= known[0]
+            or known[1] <= self.clock()
+        )
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            key for key, (_, expires_at) in self._versions.items()
+            if expires_at <= now
+        ]
+        for key in expired:
+            del self._versions[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            # token `iat`s are whole seconds
+            self.trusted_since = int(self.clock())
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def snapshot(self) -> dict[str, int]:
+        return {"size": len(self), "trusted_since": self.trusted_since}
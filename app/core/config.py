@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from typing import Literal
 
@@ -39,10 +40,80 @@ class JWTAuth(BaseModel):
     access_public_key_path: Path = certs_path / "access_public.pem"
     refresh_private_key_path: Path = certs_path / "refresh_private.pem"
     refresh_public_key_path: Path = certs_path / "refresh_public.pem"
-    algorithm: str = "RS256"
+    access_algorithm: str = "RS256"
+    refresh_algorithm: str = "RS256"
     access_token_expires_sec: int = 900
     refresh_token_expires_days: int = 60
     max_active_auth_sessions: int = 5
+    access_claims_cache_size: int = 10_000
+    refresh_token_cache_size: int = 10_000
+    refresh_token_cache_max_staleness_sec: float = 30
+    access_token_denylist_bucket_sec: int = 60
+    embed_user_claims: bool = False
+    user_claims_version: int = 1
+    jwks_max_age_sec: int = 300
+    keys_reload_interval_sec: float = 5
+    refresh_token_mode: Literal["jwt", "opaque"] = "jwt"
+    opaque_refresh_token_bytes: int = 32
+
+
+class PasswordHashing(BaseModel):
+    executor_max_workers: int = os.cpu_count() or 1
+    default_algorithm: Literal["bcrypt", "scrypt", "pbkdf2_sha256"] = "bcrypt"
+    bcrypt_rounds: int = 12
+    bcrypt_rounds_tolerance: int = 1
+    scrypt_n: int = 2 ** 14
+    scrypt_r: int = 8
+    scrypt_p: int = 1
+    pbkdf2_iterations: int = 600_000
+    calibrate_on_startup: bool = False
+    calibration_target_ms: int = 250
+    calibration_min_rounds: int = 12
+    calibration_samples: int = 3
+
+
+class LoginAdmission(BaseModel):
+    max_in_flight: int = (os.cpu_count() or 1) * 2
+    max_queued: int = 100
+    max_queue_wait_sec: float = 1.0
+    retry_after_sec: int = 1
+
+
+class CryptoExecutor(BaseModel):
+    mode: Literal["inline", "thread", "process"] = "inline"
+    max_workers: int = os.cpu_count() or 1
+
+
+class AuthScheduler(BaseModel):
+    max_concurrency: int = (os.cpu_count() or 1) + 1
+    token_verify_quota: int = (os.cpu_count() or 1) + 1
+    token_mint_quota: int = os.cpu_count() or 1
+    password_hash_quota: int = max((os.cpu_count() or 1) - 1, 1)
+    queue_time_buckets_sec: list[float] = [
+        0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+    ]
+
+
+class TokenSweeper(BaseModel):
+    interval_sec: float = 300
+    batch_size: int = 1000
+    batch_pause_sec: float = 0.1
+    advisory_lock_key: int = 7_340_019
+
+
+class RefreshTokenPartitioning(BaseModel):
+    enabled: bool = False
+    interval_days: int = 7
+    premake: int = 2
+    drop_lock_timeout_ms: int = 100
+
+
+class CacheInvalidation(BaseModel):
+    enabled: bool = True
+    channel: str = "cache_invalidation"
+    reconnect_delay_sec: float = 1.0
+    probe_interval_sec: float = 30
+    probe_timeout_sec: float = 5
 
 
 class Settings(BaseSettings):
@@ -58,6 +129,13 @@ class Settings(BaseSettings):
     api: ApiPrefix = ApiPrefix()
     db: DatabaseConfig
     auth: JWTAuth = JWTAuth()
+    hashing: PasswordHashing = PasswordHashing()
+    login_admission: LoginAdmission = LoginAdmission()
+    crypto: CryptoExecutor = CryptoExecutor()
+    scheduler: AuthScheduler = AuthScheduler()
+    sweeper: TokenSweeper = TokenSweeper()
+    partitioning: RefreshTokenPartitioning = RefreshTokenPartitioning()
+    invalidation: CacheInvalidation = CacheInvalidation()
 
 
 settings = Settings()  # type: ignore
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Callable, Hashable
+
+
+class ExpiringDenylist:
+    """
+    A set of keys (e.g. token ids) that expire together with the tokens.
+    Keys are grouped into buckets by their expiration time, so a lookup
+    (which knows the expiration time from the token itself) touches only
+    one bucket and expired keys are dropped a whole bucket at a time.
+    """
+
+    def __init__(
+        self,
+        bucket_size: int,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.bucket_size = bucket_size
+        self.clock = clock
+        self._buckets: dict[int, set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, expires_at: float) -> int:
+        return int(expires_at) // self.bucket_size
+
+    def add(self, key: Hashable, expires_at: float) -> None:
+        now = self.clock()
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._purge(now)
+            self._buckets.setdefault(self._bucket(expires_at), set()).add(key)
+
+    def contains(self, key: Hashable, expires_at: float) -> bool:
+        bucket = self._buckets.get(self._bucket(expires_at))
+        return bucket is not None and key in bucket
+
+    def _purge(self, now: float) -> None:
+        # a bucket may still hold keys expiring at the end of it
+        expired = [
+            bucket for bucket in self._buckets
+            if (bucket + 1) * self.bucket_size <= now
+        ]
+        for bucket in expired:
+            del self._buckets[bucket]
+
+    def purge(self) -> None:
+        with self._lock:
+            self._purge(self.clock())
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def snapshot(self) -> dict[str, int]:
+        return {"size": len(self), "buckets": len(self._buckets)}
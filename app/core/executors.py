@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import multiprocessing
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorStats:
+    def __init__(self, max_workers: int):
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self.created_at = time.monotonic()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.busy_time = 0.0
+
+    def task_submitted(self) -> None:
+        with self._lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def task_started(self, wait_time: float) -> None:
+        with self._lock:
+            self.queue_depth -= 1
+            self.in_flight += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def task_cancelled(self) -> None:
+        with self._lock:
+            self.queue_depth -= 1
+
+    def task_finished(self, run_time: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.busy_time += run_time
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            started = self.completed + self.in_flight
+            capacity = self.max_workers * (time.monotonic() - self.created_at)
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "avg_wait_time": (
+                    self.total_wait_time / started if started else 0.0
+                ),
+                "max_wait_time": self.max_wait_time,
+                "utilisation": (
+                    min(self.busy_time / capacity, 1.0) if capacity else 0.0
+                ),
+            }
+
+
+class MeteredThreadPool:
+    """
+    A thread pool for blocking CPU-bound calls made from async code.
+    The pool is created on first use, so it can be shut down in the
+    application lifespan and transparently recreated afterwards.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ""):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self.stats = ExecutorStats(max_workers)
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.thread_name_prefix,
+                )
+            return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        submitted_at = time.monotonic()
+
+        def call() -> T:
+            started_at = time.monotonic()
+            self.stats.task_started(started_at - submitted_at)
+            try:
+                return func(*args)
+            finally:
+                self.stats.task_finished(time.monotonic() - started_at)
+
+        self.stats.task_submitted()
+        future = self._get_executor().submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                self.stats.task_cancelled()
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def _timed_call(func: Callable[..., T], *args):
+    started_at = time.monotonic()
+    try:
+        result, error = func(*args), None
+    except Exception as exc:
+        result, error = None, exc
+    return started_at, time.monotonic(), result, error
+
+
+class MeteredProcessPool:
+    """
+    A process pool for CPU-bound calls that hold the GIL.
+    `initializer` runs once in every worker (e.g. to preload keys).
+    Workers report when they picked a task up, so the wait and busy time
+    are accounted once the result is back in the parent process.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        initializer: Callable[..., None] | None = None,
+        initargs: tuple = (),
+    ):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.stats = ExecutorStats(max_workers)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+            return self._executor
+
+    def _account(
+        self,
+        submitted_at: float,
+        started_at: float,
+        finished_at: float,
+    ) -> None:
+        self.stats.task_started(started_at - submitted_at)
+        self.stats.task_finished(finished_at - started_at)
+
+    def _account_abandoned(self, submitted_at: float, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self.stats.task_cancelled()
+        else:
+            started_at, finished_at, _, _ = future.result()
+            self._account(submitted_at, started_at, finished_at)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        submitted_at = time.monotonic()
+        self.stats.task_submitted()
+        future = self._get_executor().submit(_timed_call, func, *args)
+        try:
+            started_at, finished_at, result, error = (
+                await asyncio.wrap_future(future)
+            )
+        except asyncio.CancelledError:
+            future.cancel()
+            future.add_done_callback(
+                lambda f: self._account_abandoned(submitted_at, f)
+            )
+            raise
+        except BaseException:
+            self.stats.task_cancelled()
+            raise
+        self._account(submitted_at, started_at, finished_at)
+        if error is not None:
+            raise error
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,142 @@
+import asyncio
+import bisect
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Sequence
+
+
+class WorkClass(IntEnum):
+    """CPU-bound auth work, lower value means higher priority."""
+
+    TOKEN_VERIFY = 0
+    TOKEN_MINT = 1
+    PASSWORD_HASH = 2
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+
+class PriorityScheduler:
+    """
+    Hands out slots for CPU-bound work by priority class.
+    At most `max_concurrency` slots are taken at once and every class but
+    the top one is capped by a quota below it, so cheap token verification
+    never queues behind a burst of password hashing. Waiters of the same
+    class are served in FIFO order.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        quotas: dict[WorkClass, int],
+        queue_time_buckets: Sequence[float],
+    ):
+        for work_class in list(WorkClass)[1:]:
+            if quotas[work_class] >= max_concurrency:
+                raise ValueError(
+                    f"{work_class.name.lower()} quota must be below "
+                    f"max_concurrency ({max_concurrency}) to leave room "
+                    f"for higher priority work"
+                )
+        self.max_concurrency = max_concurrency
+        self.quotas = quotas
+        self.in_flight = 0
+        self._in_flight = {work_class: 0 for work_class in WorkClass}
+        self._completed = {work_class: 0 for work_class in WorkClass}
+        self._waiters: dict[WorkClass, deque[asyncio.Future]] = {
+            work_class: deque() for work_class in WorkClass
+        }
+        self._queue_time = {
+            work_class: Histogram(queue_time_buckets)
+            for work_class in WorkClass
+        }
+
+    def _can_start(self, work_class: WorkClass) -> bool:
+        return (
+            self.in_flight < self.max_concurrency
+            and self._in_flight[work_class] < self.quotas[work_class]
+        )
+
+    def _has_waiters_ahead(self, work_class: WorkClass) -> bool:
+        return any(
+            self._waiters[other] for other in WorkClass if other <= work_class
+        )
+
+    def _start(self, work_class: WorkClass) -> None:
+        self.in_flight += 1
+        self._in_flight[work_class] += 1
+
+    def _wake_up(self) -> None:
+        for work_class in WorkClass:
+            waiters = self._waiters[work_class]
+            while waiters and self._can_start(work_class):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self._start(work_class)
+                    waiter.set_result(None)
+
+    def release(self, work_class: WorkClass) -> None:
+        self.in_flight -= 1
+        self._in_flight[work_class] -= 1
+        self._completed[work_class] += 1
+        self._wake_up()
+
+    async def acquire(self, work_class: WorkClass) -> None:
+        queued_at = time.monotonic()
+        if self._can_start(work_class) and not self._has_waiters_ahead(
+            work_class
+        ):
+            self._start(work_class)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters[work_class].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters[work_class]:
+                    self._waiters[work_class].remove(waiter)
+                elif not waiter.cancelled():
+                    # The slot was handed over right as we got cancelled.
+                    self.release(work_class)
+                raise
+        self._queue_time[work_class].observe(time.monotonic() - queued_at)
+
+    @asynccontextmanager
+    async def slot(self, work_class: WorkClass) -> AsyncIterator[None]:
+        await self.acquire(work_class)
+        try:
+            yield
+        finally:
+            self.release(work_class)
+
+    def snapshot(self) -> dict[str, dict]:
+        return {
+            work_class.name.lower(): {
+                "in_flight": self._in_flight[work_class],
+                "waiting": len(self._waiters[work_class]),
+                "completed": self._completed[work_class],
+                "queue_time": self._queue_time[work_class].snapshot(),
+            }
+            for work_class in WorkClass
+        }
@@ -1,6 +1,7 @@
 from typing import AsyncGenerator
 
 from app.core.config import settings
+from app.db.invalidation import InvalidationBus
 from app.db.manager import DatabaseSessionManager
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,6 +13,14 @@ database_manager = DatabaseSessionManager(
         max_overflow=settings.db.max_overflow,
 )
 
+invalidation_bus = InvalidationBus(
+        engine=database_manager.engine,
+        channel=settings.invalidation.channel,
+        reconnect_delay=settings.invalidation.reconnect_delay_sec,
+        probe_interval=settings.invalidation.probe_interval_sec,
+        probe_timeout=settings.invalidation.probe_timeout_sec,
+)
+
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     async for session in database_manager.get_session():
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Callable, NamedTuple
+
+import orjson
+import psycopg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# pg_notify rejects payloads of 8000 bytes and more
+MAX_PAYLOAD_BYTES = 7900
+
+
+class Subscriber(NamedTuple):
+    on_keys: Callable[[list[str]], None]
+    on_flush: Callable[[], None]
+
+
+def _encode_messages(topic: str, keys: list[str]) -> list[str]:
+    """Packs the keys into as few notification payloads as possible."""
+    messages = []
+    batch: list[str] = []
+    size = len(orjson.dumps({"t": topic, "k": []}))
+    for key in keys:
+        key_size = len(orjson.dumps(key)) + 1
+        if batch and size + key_size > MAX_PAYLOAD_BYTES:
+            messages.append(orjson.dumps({"t": topic, "k": batch}).decode())
+            batch = []
+            size = len(orjson.dumps({"t": topic, "k": []}))
+        batch.append(key)
+        size += key_size
+    if batch:
+        messages.append(orjson.dumps({"t": topic, "k": batch}).decode())
+    return messages
+
+
+class InvalidationBus:
+    """
+    Propagates cache invalidations between processes over Postgres
+    LISTEN/NOTIFY. Writers publish the invalidated keys inside their own
+    transaction, so the message is delivered only if (and right after)
+    the change is committed. Every process listens on a dedicated
+    connection; notifications sent while it was disconnected are lost,
+    so all subscribers are flushed whenever the listener (re)connects.
+    A connection that stays quiet for `probe_interval` is probed, so one
+    that silently went away (e.g. dropped by a load balancer) is noticed.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        channel: str,
+        reconnect_delay: float = 1.0,
+        probe_interval: float = 30,
+        probe_timeout: float = 5,
+    ):
+        self.engine = engine
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.stats: Counter[str] = Counter()
+        self.listening = asyncio.Event()
+        self.backend_pid: int | None = None
+        self._subscribers: dict[str, Subscriber] = {}
+
+    def subscribe(
+        self,
+        topic: str,
+        on_keys: Callable[[list[str]], None],
+        on_flush: Callable[[], None],
+    ) -> None:
+        self._subscribers[topic] = Subscriber(on_keys, on_flush)
+
+    async def publish(
+        self,
+        session: AsyncSession,
+        topic: str,
+        keys: list[str],
+    ) -> None:
+        for message in _encode_messages(topic, keys):
+            await session.execute(
+                select(func.pg_notify(self.channel, message))
+            )
+            self.stats["published"] += 1
+
+    def flush(self) -> None:
+        for subscriber in self._subscribers.values():
+            subscriber.on_flush()
+        self.stats["flushes"] += 1
+
+    def dispatch(self, payload: str) -> None:
+        self.stats["received"] += 1
+        try:
+            message = orjson.loads(payload)
+            topic, keys = message["t"], message["k"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Malformed invalidation message: %.100s", payload)
+            self.flush()
+            return
+        if (subscriber := self._subscribers.get(topic)) is not None:
+            subscriber.on_keys(keys)
+
+    async def _listen(self) -> None:
+        raw_connection = await self.engine.raw_connection()
+        connection: psycopg.AsyncConnection | None = (
+            raw_connection.driver_connection
+        )
+        # LISTEN is bound to the session, keep it out of the pool
+        raw_connection.detach()
+        if connection is None:
+            raise RuntimeError("Invalidation listener got no connection")
+        try:
+            await connection.set_autocommit(True)
+            await connection.execute(f'LISTEN "{self.channel}"')
+            self.backend_pid = connection.info.backend_pid
+            self.flush()
+            self.listening.set()
+            while True:
+                async for notify in connection.notifies(
+                    timeout=self.probe_interval
+                ):
+                    self.dispatch(notify.payload)
+                await self._probe(connection)
+        finally:
+            await connection.close()
+
+    async def _probe(self, connection: psycopg.AsyncConnection) -> None:
+        # a failed or hanging probe is handled like a lost connection
+        async with asyncio.timeout(self.probe_timeout):
+            await connection.execute("SELECT 1")
+        self.stats["probes"] += 1
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except Exception:
+                logger.exception(
+                    "Invalidation listener failed, reconnecting in %s s",
+                    self.reconnect_delay,
+                )
+            finally:
+                self.listening.clear()
+                self.backend_pid = None
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(self.reconnect_delay)
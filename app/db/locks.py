@@ -0,0 +1,12 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def try_advisory_xact_lock(session: AsyncSession, key: int) -> bool:
+    """
+    Takes a Postgres advisory lock that is released with the current
+    transaction, so it never leaks into a pooled connection.
+    """
+    return bool(
+        await session.scalar(select(func.pg_try_advisory_xact_lock(key)))
+    )
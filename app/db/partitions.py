@@ -0,0 +1,214 @@
+import logging
+import re
+from typing import NamedTuple
+
+from psycopg.errors import LockNotAvailable
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+_RANGE_BOUND = re.compile(r"FROM \('?(-?\d+)'?\) TO \('?(-?\d+)'?\)")
+_PARTITION_KEY = re.compile(r"^RANGE \((\w+)\)$")
+
+
+class RangePartition(NamedTuple):
+    name: str
+    start: int
+    end: int
+
+
+def partition_start(value: int, interval: int) -> int:
+    return value - value % interval
+
+
+def partition_name(table: str, start: int) -> str:
+    return f"{table}_p{start}"
+
+
+def create_range_partition_sql(table: str, start: int, end: int) -> str:
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, start)}" '
+        f'PARTITION OF "{table}" FOR VALUES FROM ({start}) TO ({end})'
+    )
+
+
+async def is_partitioned(session: AsyncSession, table: str) -> bool:
+    return bool(
+        await session.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table))"
+            ),
+            {"table": table},
+        )
+    )
+
+
+async def _get_partition_bounds(
+    session: AsyncSession,
+    table: str,
+) -> list[tuple[str, str]]:
+    result = await session.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    )
+    return [(name, bound) for name, bound in result.all()]
+
+
+async def get_range_partitions(
+    session: AsyncSession,
+    table: str,
+) -> list[RangePartition]:
+    """
+    Returns the range partitions of the table ordered by their lower
+    bound, the default partition is skipped.
+    """
+    partitions = []
+    for name, bound in await _get_partition_bounds(session, table):
+        if match := _RANGE_BOUND.search(bound):
+            start, end = map(int, match.groups())
+            partitions.append(RangePartition(name, start, end))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+async def get_default_partition(
+    session: AsyncSession,
+    table: str,
+) -> str | None:
+    for name, bound in await _get_partition_bounds(session, table):
+        if bound == "DEFAULT":
+            return name
+    return None
+
+
+async def get_partition_key(session: AsyncSession, table: str) -> str:
+    key_definition = await session.scalar(
+        text("SELECT pg_get_partkeydef(to_regclass(:table))"),
+        {"table": table},
+    )
+    if not (match := _PARTITION_KEY.match(key_definition or "")):
+        raise ValueError(f"{table} is not range partitioned by one column")
+    return match.group(1)
+
+
+async def _create_range_partition_from_default(
+    session: AsyncSession,
+    table: str,
+    default_partition: str,
+    key: str,
+    start: int,
+    end: int,
+) -> bool:
+    """
+    Postgres refuses to create a partition for a range that already has
+    rows in the default partition. If there are any, the partition is
+    created detached, the rows are moved over and it is attached then.
+    Returns False if there was nothing to move.
+    """
+    name = partition_name(table, start)
+    in_range = f'"{key}" >= {start} AND "{key}" < {end}'
+    has_rows = await session.scalar(
+        text(
+            f'SELECT EXISTS (SELECT 1 FROM "{default_partition}" '
+            f"WHERE {in_range})"
+        )
+    )
+    if not has_rows:
+        return False
+    for statement in (
+        f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)',
+        f'WITH moved AS (DELETE FROM "{default_partition}" '
+        f"WHERE {in_range} RETURNING *) "
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM ({start}) TO ({end})",
+    ):
+        await session.execute(text(statement))
+    return True
+
+
+async def create_range_partitions(
+    session: AsyncSession,
+    table: str,
+    start: int,
+    end: int,
+    interval: int,
+) -> list[str]:
+    """
+    Makes sure [start, end) is covered by partitions of `interval` width
+    aligned to multiples of it. Slots that overlap existing partitions
+    are left alone, rows already in the default partition are moved to
+    the new ones.
+    """
+    existing = await get_range_partitions(session, table)
+    default_partition = await get_default_partition(session, table)
+    key = await get_partition_key(session, table) if default_partition else ""
+    created = []
+    for lower in range(partition_start(start, interval), end, interval):
+        upper = lower + interval
+        if any(p.start < upper and lower < p.end for p in existing):
+            continue
+        if default_partition is None or not (
+            await _create_range_partition_from_default(
+                session, table, default_partition, key, lower, upper
+            )
+        ):
+            await session.execute(
+                text(create_range_partition_sql(table, lower, upper))
+            )
+        created.append(partition_name(table, lower))
+    return created
+
+
+async def _drop_partition(
+    session: AsyncSession,
+    table: str,
+    partition: str,
+    lock_timeout_ms: int,
+) -> bool:
+    """
+    Detaching needs an exclusive lock on the parent table, and every query
+    on it would queue behind a long wait for that lock. So the wait is
+    kept short and the partition is left for the next run if it times out.
+    """
+    try:
+        async with session.begin_nested():
+            await session.execute(
+                text("SELECT set_config('lock_timeout', :timeout, true)"),
+                {"timeout": f"{lock_timeout_ms}ms"},
+            )
+            await session.execute(
+                text(f'ALTER TABLE "{table}" DETACH PARTITION "{partition}"')
+            )
+            await session.execute(text(f'DROP TABLE "{partition}"'))
+    except OperationalError as e:
+        if not isinstance(e.orig, LockNotAvailable):
+            raise
+        logger.info("Partition %s is busy, dropping it later", partition)
+        return False
+    return True
+
+
+async def drop_range_partitions_before(
+    session: AsyncSession,
+    table: str,
+    before: int,
+    lock_timeout_ms: int = 100,
+) -> list[str]:
+    """
+    Drops the partitions that only hold values lower than `before`, the
+    ones that can't be locked within `lock_timeout_ms` are skipped.
+    """
+    dropped = []
+    for partition in await get_range_partitions(session, table):
+        if partition.end <= before and await _drop_partition(
+            session, table, partition.name, lock_timeout_ms
+        ):
+            dropped.append(partition.name)
+    return dropped
@@ -0,0 +1,6 @@
+class AdmissionException(Exception):
+    pass
+
+
+class AdmissionRejected(AdmissionException):
+    pass
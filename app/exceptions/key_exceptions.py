@@ -0,0 +1,10 @@
+class KeyException(Exception):
+    pass
+
+
+class UnsupportedAlgorithm(KeyException):
+    pass
+
+
+class KeyTypeMismatch(KeyException):
+    pass
@@ -1,17 +1,60 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
-from app.api import router_v1
+from app.api import router_v1, well_known_router
 from app.core.config import settings
 from app.db import close_db
+from app.db.dependencies import invalidation_bus
+from app.services.auth_service import (
+    crypto_executor,
+    password_hashing_pool,
+    preload_crypto_keys,
+)
+from app.services.jwt_key_service import jwt_key_provider
+from app.services.password_hashers import (
+    BCRYPT_MAX_ROUNDS,
+    calibrate_bcrypt_rounds,
+)
+from app.services.token_sweeper_service import run_refresh_token_sweeper
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.hashing.calibrate_on_startup:
+        settings.hashing.bcrypt_rounds = await password_hashing_pool.run(
+            calibrate_bcrypt_rounds,
+            settings.hashing.calibration_target_ms,
+            settings.hashing.calibration_min_rounds,
+            BCRYPT_MAX_ROUNDS,
+            settings.hashing.calibration_samples,
+        )
+    jwt_key_provider.load()
+    if crypto_executor:
+        # spawns the workers up front instead of on the first login
+        await crypto_executor.run(preload_crypto_keys)
+    background_tasks = []
+    if settings.auth.keys_reload_interval_sec > 0:
+        background_tasks.append(asyncio.create_task(
+            jwt_key_provider.watch(settings.auth.keys_reload_interval_sec)
+        ))
+    if settings.invalidation.enabled:
+        background_tasks.append(asyncio.create_task(invalidation_bus.run()))
+    if settings.sweeper.interval_sec > 0:
+        background_tasks.append(asyncio.create_task(
+            run_refresh_token_sweeper(settings.sweeper)
+        ))
     yield
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hashing_pool.shutdown()
+    if crypto_executor:
+        crypto_executor.shutdown()
     await close_db()
 
 
@@ -24,6 +67,10 @@ main_app.include_router(
     prefix=settings.api.prefix_v1,
     tags=["v1"]
 )
+main_app.include_router(
+    well_known_router,
+    tags=["well-known"]
+)
 
 if __name__ == '__main__':
     uvicorn.run(
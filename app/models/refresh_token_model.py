@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, JSON
+from sqlalchemy import ForeignKey, Index, JSON, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import Base
@@ -7,13 +7,29 @@ from app.models.mixins import IdUuidPkMixin
 
 class RefreshTokenModel(IdUuidPkMixin, Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index(
+            "ix_refresh_tokens_token_hash",
+            "token_hash",
+            postgresql_using="hash",
+        ),
+        Index("ix_refresh_tokens_user_id_created_at", "user_id", "created_at"),
+        Index(
+            "ix_refresh_tokens_user_id_device_fingerprint",
+            "user_id",
+            "device_fingerprint",
+        ),
+    )
 
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
-    token_hash: Mapped[str] = mapped_column(nullable=False, index=True)
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
     created_at: Mapped[int]
-    expires_at: Mapped[int]
+    expires_at: Mapped[int] = mapped_column(index=True)
     device_info: Mapped[dict] = mapped_column(JSON, nullable=False)
+    device_fingerprint: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        nullable=False,
+    )
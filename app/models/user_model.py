@@ -11,3 +11,5 @@ class UserModel(IdIntPKMixin, Base):
     password: Mapped[bytes]
     email: Mapped[str] = mapped_column(unique=True)
     active: Mapped[bool] = mapped_column(default=True)
+    # bumped whenever what the access tokens embed changes
+    claims_version: Mapped[int] = mapped_column(default=1, server_default="1")
@@ -1,6 +1,6 @@
 from typing import Type, TypeVar, Generic, Any
 
-from sqlalchemy import select
+from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Base
@@ -16,9 +16,13 @@ class BaseRepository(Generic[T]):
         self,
         session: AsyncSession,
         obj_in: dict,
+        commit: bool = True,
     ) -> T:
         db_obj = self.model(**obj_in)
         session.add(db_obj)
+        if not commit:
+            await session.flush()
+            return db_obj
         await session.commit()
         await session.refresh(db_obj)
         return db_obj
@@ -48,6 +52,19 @@ class BaseRepository(Generic[T]):
         result = await session.execute(query)
         return result.scalar_one_or_none()
 
+    async def update(
+        self,
+        session: AsyncSession,
+        id_: Any,
+        values: dict,
+    ) -> T | None:
+        db_obj = await self.get(session, id_)
+        if db_obj:
+            for field, value in values.items():
+                setattr(db_obj, field, value)
+            await session.commit()
+        return db_obj
+
     async def delete(
         self,
         session: AsyncSession,
@@ -57,3 +74,15 @@ class BaseRepository(Generic[T]):
         if db_obj:
             await session.delete(db_obj)
             await session.commit()
+
+    async def delete_by_filter(
+        self,
+        session: AsyncSession,
+        params: dict,
+        commit: bool = True,
+    ) -> int:
+        query = delete(self.model).filter_by(**params)
+        result = await session.execute(query)
+        if commit:
+            await session.commit()
+        return result.rowcount
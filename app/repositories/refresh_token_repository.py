@@ -1,8 +1,8 @@
-from sqlalchemy import select, cast
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.refresh_token_model import RefreshTokenModel
+from app.models.user_model import UserModel
 from app.repositories.base_repository import BaseRepository
 from app.schemas.device_info_schema import SDeviceInfo
 
@@ -17,14 +17,91 @@ class RefreshTokenRepository(BaseRepository[RefreshTokenModel]):
         user_id: int,
         device_info: SDeviceInfo,
     ) -> list[RefreshTokenModel]:
-        device_info_dict = device_info.model_dump()
         query = select(self.model).filter(
             self.model.user_id == user_id,
-            cast(self.model.device_info, JSONB).contains(device_info_dict),
+            self.model.device_fingerprint == device_info.fingerprint(),
         )
         result = await session.execute(query)
         same_device_tokens = result.scalars().all()
         return list(same_device_tokens)
 
+    async def delete_by_device_info(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        device_info: SDeviceInfo,
+    ) -> list[bytes]:
+        query = (
+            delete(self.model)
+            .filter(
+                self.model.user_id == user_id,
+                self.model.device_fingerprint == device_info.fingerprint(),
+            )
+            .returning(self.model.token_hash)
+        )
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+    async def delete_oldest(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        keep: int,
+    ) -> list[bytes]:
+        """
+        Deletes all but the `keep` newest sessions of the user and returns
+        the hashes of the deleted tokens.
+        """
+        oldest_sessions = (
+            select(self.model.id)
+            .filter(self.model.user_id == user_id)
+            .order_by(self.model.created_at.desc(), self.model.id.desc())
+            .offset(keep)
+        )
+        query = (
+            delete(self.model)
+            .filter(
+                self.model.user_id == user_id,
+                self.model.id.in_(oldest_sessions),
+            )
+            .returning(self.model.token_hash)
+        )
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+    async def delete_expired(
+        self,
+        session: AsyncSession,
+        now: int,
+        limit: int,
+    ) -> int:
+        expired_sessions = (
+            select(self.model.id)
+            .filter(self.model.expires_at <= now)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query = delete(self.model).filter(
+            self.model.id.in_(expired_sessions)
+        )
+        result = await session.execute(query)
+        return result.rowcount
+
+    async def get_with_username(
+        self,
+        session: AsyncSession,
+        **params,
+    ) -> tuple[RefreshTokenModel, str] | None:
+        query = (
+            select(self.model, UserModel.username)
+            .join(UserModel, UserModel.id == self.model.user_id)
+            .filter(
+                *(getattr(self.model, k) == v for k, v in params.items())
+            )
+        )
+        result = await session.execute(query)
+        row = result.first()
+        return (row[0], row[1]) if row else None
+
 
 refresh_token_repo = RefreshTokenRepository()
@@ -1,3 +1,6 @@
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.models import UserModel
 from app.repositories.base_repository import BaseRepository
 
@@ -6,5 +9,28 @@ class UserRepository(BaseRepository[UserModel]):
     def __init__(self):
         super().__init__(UserModel)
 
+    async def update_claims(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        values: dict,
+    ) -> int | None:
+        """
+        Updates the user and bumps its `claims_version` in one statement,
+        so concurrent updates never hand out the same version. Returns the
+        new version, or None if there is no such user.
+        """
+        query = (
+            update(self.model)
+            .filter(self.model.id == user_id)
+            .values(
+                **values,
+                claims_version=self.model.claims_version + 1,
+            )
+            .returning(self.model.claims_version)
+        )
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
 
 user_repo = UserRepository()
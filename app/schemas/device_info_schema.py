@@ -1,6 +1,24 @@
+import hashlib
+
+import orjson
 from pydantic import BaseModel
 
+FINGERPRINT_SIZE = 16
+
 
 class SDeviceInfo(BaseModel):
     user_agent: str | None
     ip_address: str | None
+
+    def fingerprint(self) -> bytes:
+        normalized = orjson.dumps(
+            {
+                "user_agent": (self.user_agent or "").strip(),
+                "ip_address": (self.ip_address or "").strip(),
+            },
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.blake2b(
+            normalized,
+            digest_size=FINGERPRINT_SIZE,
+        ).digest()
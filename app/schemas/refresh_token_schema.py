@@ -1,11 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 
 from app.schemas.device_info_schema import SDeviceInfo
 
 
 class SRefreshToken(BaseModel):
     user_id: int
-    token_hash: str
+    token_hash: bytes
     created_at: int
     expires_at: int
     device_info: SDeviceInfo
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def device_fingerprint(self) -> bytes:
+        return self.device_info.fingerprint()
@@ -18,3 +18,8 @@ class SUserSignUp(SUserSignIn):
 
 class SUserShortInfo(SUserBase):
     email: EmailStr
+
+
+class SUserClaims(SUserShortInfo):
+    id: int
+    active: bool
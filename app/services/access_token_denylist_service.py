@@ -0,0 +1,64 @@
+import logging
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.denylist import ExpiringDenylist
+from app.db.dependencies import invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_DENYLIST_TOPIC = "access_token_denylist"
+
+# Revoked access tokens by `jti`, filled by logouts in every process. The
+# entries are not stored anywhere else: a process that was not listening
+# when a token got revoked accepts it until its `exp`.
+access_token_denylist = ExpiringDenylist(
+    bucket_size=settings.auth.access_token_denylist_bucket_sec,
+)
+
+
+def _jti_key(jti: str) -> bytes:
+    try:
+        return uuid.UUID(hex=jti).bytes
+    except ValueError:
+        return jti.encode()
+
+
+def _on_revoked_tokens(keys: list[str]) -> None:
+    for key in keys:
+        try:
+            expires_at, jti = key.split(":", 1)
+            access_token_denylist.add(_jti_key(jti), int(expires_at))
+        except (AttributeError, ValueError):
+            logger.warning("Malformed revoked access token key: %.100r", key)
+
+
+invalidation_bus.subscribe(
+    ACCESS_TOKEN_DENYLIST_TOPIC,
+    on_keys=_on_revoked_tokens,
+    # nothing to flush, revocations can only be missed, not made stale
+    on_flush=lambda: None,
+)
+
+
+def is_access_token_revoked(payload: dict) -> bool:
+    jti, expires_at = payload.get("jti"), payload.get("exp")
+    if not isinstance(jti, str) or not isinstance(expires_at, int):
+        return False
+    return access_token_denylist.contains(_jti_key(jti), expires_at)
+
+
+async def revoke_access_token(session: AsyncSession, payload: dict) -> None:
+    jti, expires_at = payload.get("jti"), payload.get("exp")
+    if not isinstance(jti, str) or not isinstance(expires_at, int):
+        return
+    access_token_denylist.add(_jti_key(jti), expires_at)
+    if settings.invalidation.enabled:
+        await invalidation_bus.publish(
+            session,
+            ACCESS_TOKEN_DENYLIST_TOPIC,
+            [f"{expires_at}:{jti}"],
+        )
+        await session.commit()
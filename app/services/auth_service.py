@@ -1,13 +1,92 @@
+import functools
+import hashlib
+import secrets
+import uuid
 from datetime import datetime, UTC
 from enum import StrEnum
+from typing import Any, NamedTuple
 
-import bcrypt
 import jwt
+from cryptography.hazmat.primitives.asymmetric.types import (
+    PrivateKeyTypes,
+    PublicKeyTypes,
+)
 
-from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.claims_versions import ClaimsVersions
+from app.core.config import settings, AuthScheduler, CryptoExecutor
+from app.core.executors import MeteredProcessPool, MeteredThreadPool
+from app.core.scheduler import PriorityScheduler, WorkClass
+from app.models import UserModel
+from app.services.jwt_codec import (
+    decode_segment,
+    encode_jwt,
+    verify_jwt_signature,
+)
+from app.services.jwt_key_service import jwt_key_provider
+from app.services.jwt_precheck import (
+    precheck_jwt,
+    reject,
+    reject_algorithm,
+    RejectionReason,
+)
+from app.services.password_hashers import build_password_hasher_registry
 
 SECS_IN_HOUR = 60 * 60 * 24
 
+password_hashing_pool = MeteredThreadPool(
+    max_workers=settings.hashing.executor_max_workers,
+    thread_name_prefix="password-hashing",
+)
+password_hashers = build_password_hasher_registry(settings.hashing)
+
+
+def build_auth_scheduler(config: AuthScheduler) -> PriorityScheduler:
+    return PriorityScheduler(
+        max_concurrency=config.max_concurrency,
+        quotas={
+            WorkClass.TOKEN_VERIFY: config.token_verify_quota,
+            WorkClass.TOKEN_MINT: config.token_mint_quota,
+            WorkClass.PASSWORD_HASH: config.password_hash_quota,
+        },
+        queue_time_buckets=config.queue_time_buckets_sec,
+    )
+
+
+auth_scheduler = build_auth_scheduler(settings.scheduler)
+access_claims_cache: TTLCache[bytes, dict] = TTLCache(
+    maxsize=settings.auth.access_claims_cache_size,
+)
+jwt_key_provider.add_reload_listener(access_claims_cache.clear)
+
+
+def preload_crypto_keys() -> None:
+    jwt_key_provider.load()
+
+
+def build_crypto_executor(
+    config: CryptoExecutor,
+) -> MeteredThreadPool | MeteredProcessPool | None:
+    if config.mode == "thread":
+        return MeteredThreadPool(
+            max_workers=config.max_workers,
+            thread_name_prefix="jwt-crypto",
+        )
+    if config.mode == "process":
+        return MeteredProcessPool(
+            max_workers=config.max_workers,
+            initializer=preload_crypto_keys,
+        )
+    return None
+
+
+crypto_executor = build_crypto_executor(settings.crypto)
+if isinstance(crypto_executor, MeteredProcessPool):
+    # workers hold their own copy of the keys, so they are recycled
+    jwt_key_provider.add_reload_listener(
+        functools.partial(crypto_executor.shutdown, wait=False)
+    )
+
 
 class TokenType(StrEnum):
     ACCESS = "access"
@@ -17,23 +96,43 @@ class TokenType(StrEnum):
 def _create_jwt(
     payload: dict,
     token_type: TokenType,
-    private_key: str,
+    private_key: PrivateKeyTypes | str,
     iat: int,
     expire: int,
-    algorithm: str = settings.auth.algorithm,
+    algorithm: str | None = None,
+    kid: str | None = None,
 ) -> str:
-    to_encode = payload.copy()
-    to_encode.update(
-        iat=iat,
-        exp=expire,
-        token_type=token_type,
+    claims = {
+        **payload,
+        "iat": iat,
+        "exp": expire,
+        "token_type": token_type,
+    }
+    return encode_jwt(
+        claims=claims,
+        private_key=private_key,
+        algorithm=algorithm or jwt_key_provider.get_algorithm(token_type),
+        kid=kid,
     )
-    encoded_jwt = jwt.encode(
-        payload=to_encode,
-        key=private_key,
-        algorithm=algorithm,
+
+
+def _create_jwt_with_active_key(
+    payload: dict,
+    key_type: TokenType,
+    token_type: TokenType,
+    iat: int,
+    expire: int,
+) -> str:
+    signing_key = jwt_key_provider.get_signing_key(key_type)
+    return _create_jwt(
+        payload=payload,
+        token_type=token_type,
+        private_key=signing_key.private_key,  # type: ignore
+        iat=iat,
+        expire=expire,
+        algorithm=signing_key.algorithm,
+        kid=signing_key.kid,
     )
-    return encoded_jwt
 
 
 def create_access_token(
@@ -41,8 +140,12 @@ def create_access_token(
     iat: int,
     expire: int,
     token_type: TokenType = TokenType.ACCESS,
-    private_key: str = settings.auth.access_private_key_path.read_text(),
+    private_key: PrivateKeyTypes | str | None = None,
 ) -> str:
+    if private_key is None:
+        return _create_jwt_with_active_key(
+            payload, TokenType.ACCESS, token_type, iat, expire
+        )
     return _create_jwt(
         payload=payload,
         token_type=token_type,
@@ -57,8 +160,12 @@ def create_refresh_token(
     iat: int,
     expire: int,
     token_type: TokenType = TokenType.REFRESH,
-    private_key: str = settings.auth.refresh_private_key_path.read_text(),
+    private_key: PrivateKeyTypes | str | None = None,
 ) -> str:
+    if private_key is None:
+        return _create_jwt_with_active_key(
+            payload, TokenType.REFRESH, token_type, iat, expire
+        )
     return _create_jwt(
         payload=payload,
         token_type=token_type,
@@ -68,39 +175,292 @@ def create_refresh_token(
     )
 
 
+def _resolve_jwt(
+    token: str | bytes,
+    token_type: TokenType,
+    public_key: PublicKeyTypes | str | None = None,
+    algorithm: str | None = None,
+) -> tuple[dict, PublicKeyTypes | str, str, str | None]:
+    header, payload = precheck_jwt(token, token_type)
+    if public_key is None:
+        verification_key = jwt_key_provider.get_verification_key(
+            token_type,
+            header.get("kid"),
+        )
+        if verification_key is None:
+            raise reject(
+                RejectionReason.UNKNOWN_KEY,
+                jwt.InvalidTokenError("Unknown key id"),
+            )
+        public_key = verification_key.public_key
+        algorithm = verification_key.algorithm
+    algorithm = algorithm or jwt_key_provider.get_algorithm(token_type)
+    if header["alg"] != algorithm:
+        raise reject_algorithm()
+    return payload, public_key, algorithm, header.get("kid")
+
+
 def _decode_jwt(
     token: str | bytes,
-    public_key: str,
-    algorithm: str = settings.auth.algorithm,
+    token_type: TokenType,
+    public_key: PublicKeyTypes | str | None = None,
+    algorithm: str | None = None,
 ):
-    decoded = jwt.decode(
-        jwt=token,
-        key=public_key,
-        algorithms=[algorithm]
+    payload, public_key, algorithm, _ = _resolve_jwt(
+        token, token_type, public_key, algorithm
     )
-    return decoded
+    verify_jwt_signature(token, public_key, algorithm)
+    return payload
+
+
+def _verify_jwt_signature(
+    token: str | bytes,
+    token_type: TokenType,
+    kid: str | None,
+    algorithm: str,
+) -> bool:
+    """
+    Runs in the crypto executor with the worker's own keys, the token was
+    parsed and prechecked on the loop already. Returns False if the worker
+    does not know the key (yet).
+    """
+    verification_key = jwt_key_provider.get_verification_key(token_type, kid)
+    if verification_key is None:
+        return False
+    verify_jwt_signature(token, verification_key.public_key, algorithm)
+    return True
+
+
+async def _run_crypto(work_class: WorkClass, func, *args):
+    if crypto_executor is None:
+        # runs on the loop at once, the slots only guard executor work
+        return func(*args)
+    async with auth_scheduler.slot(work_class):
+        return await crypto_executor.run(func, *args)
+
+
+async def _decode_jwt_async(token: str | bytes, token_type: TokenType):
+    if crypto_executor is None:
+        return _decode_jwt(token, token_type)
+    # the token is parsed once and cheap rejections (malformed, expired,
+    # unknown kid) stay on the loop, only the signature check is offloaded
+    payload, _, algorithm, kid = _resolve_jwt(token, token_type)
+    is_verified = await _run_crypto(
+        WorkClass.TOKEN_VERIFY,
+        _verify_jwt_signature,
+        token,
+        token_type,
+        kid,
+        algorithm,
+    )
+    if not is_verified:
+        raise reject(
+            RejectionReason.UNKNOWN_KEY,
+            jwt.InvalidTokenError("Unknown key id"),
+        )
+    return payload
+
+
+def _token_digest(token: str | bytes) -> bytes:
+    if isinstance(token, str):
+        token = token.encode()
+    return hashlib.sha256(token).digest()
+
+
+def _cache_access_payload(digest: bytes, payload: dict) -> dict:
+    if "exp" in payload:
+        access_claims_cache.set(digest, payload, payload["exp"])
+    return dict(payload)
 
 
 def decode_access_token(
     token: str | bytes,
-    public_key: str = settings.auth.access_public_key_path.read_text(),
+    public_key: PublicKeyTypes | str | None = None,
 ):
-    return _decode_jwt(token, public_key)
+    if public_key is not None:
+        return _decode_jwt(token, TokenType.ACCESS, public_key)
+
+    digest = _token_digest(token)
+    if (cached_payload := access_claims_cache.get(digest)) is not None:
+        return dict(cached_payload)
+
+    payload = _decode_jwt(token, TokenType.ACCESS)
+    return _cache_access_payload(digest, payload)
+
+
+async def decode_access_token_async(token: str | bytes) -> dict:
+    digest = _token_digest(token)
+    if (cached_payload := access_claims_cache.get(digest)) is not None:
+        return dict(cached_payload)
+
+    payload = await _decode_jwt_async(token, TokenType.ACCESS)
+    return _cache_access_payload(digest, payload)
+
+
+def invalidate_access_token(token: str | bytes) -> None:
+    access_claims_cache.invalidate(_token_digest(token))
 
 
 def decode_refresh_token(
     token: str | bytes,
-    public_key: str = settings.auth.refresh_public_key_path.read_text(),
+    public_key: PublicKeyTypes | str | None = None,
 ):
-    return _decode_jwt(token, public_key)
+    return _decode_jwt(token, TokenType.REFRESH, public_key)
+
+
+async def decode_refresh_token_async(token: str | bytes) -> dict:
+    return await _decode_jwt_async(token, TokenType.REFRESH)
+
+
+async def create_access_token_async(
+    payload: dict,
+    iat: int,
+    expire: int,
+) -> str:
+    return await _run_crypto(
+        WorkClass.TOKEN_MINT, create_access_token, payload, iat, expire
+    )
+
+
+USER_CLAIMS = ("uid", "email", "active", "cv", "ucv")
+
+# Users changed while their older access tokens are still valid, filled by
+# `update_user_claims` in every process.
+user_claims_versions = ClaimsVersions(
+    ttl=settings.auth.access_token_expires_sec,
+)
+
+
+def build_access_token_payload(user: UserModel) -> dict:
+    """
+    With `embed_user_claims` the token also carries what `/me/` returns,
+    stamped with the current `user_claims_version` and the user's own
+    `claims_version`.
+    """
+    payload: dict[str, Any] = {"sub": user.username}
+    if settings.auth.embed_user_claims:
+        payload |= {
+            "uid": user.id,
+            "email": user.email,
+            "active": user.active,
+            "cv": settings.auth.user_claims_version,
+            "ucv": user.claims_version,
+        }
+    return payload
+
+
+def user_claims_are_current(payload: dict) -> bool:
+    """
+    Whether the user can be taken from the token instead of the DB.
+    Bumping `user_claims_version` makes every token issued before fall
+    back to the DB, changing a user does the same for its tokens.
+    """
+    return (
+        settings.auth.embed_user_claims
+        and payload.get("cv") == settings.auth.user_claims_version
+        and all(claim in payload for claim in USER_CLAIMS)
+        and user_claims_versions.is_current(
+            payload["uid"], payload["ucv"], payload.get("iat", 0)
+        )
+    )
+
+
+async def issue_access_token(
+    payload: dict,
+    iat: int,
+    expire: int,
+) -> str:
+    """Mints an access token with a unique `jti`, so it can be revoked."""
+    payload = {**payload, "jti": uuid.uuid4().hex}
+    return await create_access_token_async(payload, iat, expire)
+
+
+async def create_refresh_token_async(
+    payload: dict,
+    iat: int,
+    expire: int,
+) -> str:
+    return await _run_crypto(
+        WorkClass.TOKEN_MINT, create_refresh_token, payload, iat, expire
+    )
+
+
+def create_opaque_refresh_token(session_id: uuid.UUID, expire: int) -> str:
+    secret = secrets.token_urlsafe(settings.auth.opaque_refresh_token_bytes)
+    return f"{session_id}.{expire}.{secret}"
+
+
+async def issue_refresh_token(
+    payload: dict,
+    iat: int,
+    expire: int,
+    session_id: uuid.UUID,
+) -> str:
+    """
+    Both kinds of refresh tokens carry the key of their refresh_tokens
+    row (id and expiry): as the `jti`/`exp` claims or as the prefix of
+    an opaque token. In the `opaque` mode the rest of the token is a
+    random string, its subject lives only in the DB.
+    """
+    if settings.auth.refresh_token_mode == "opaque":
+        return create_opaque_refresh_token(session_id, expire)
+    payload = {**payload, "jti": str(session_id)}
+    return await create_refresh_token_async(payload, iat, expire)
+
+
+class RefreshTokenKey(NamedTuple):
+    session_id: uuid.UUID
+    expires_at: int | None
+
+
+def get_refresh_token_key(token: str) -> RefreshTokenKey | None:
+    """Reads the session key without verifying the token."""
+    parts = token.split(".")
+    try:
+        if len(parts) == 2:
+            return RefreshTokenKey(uuid.UUID(parts[0]), None)
+        if len(parts) != 3:
+            return None
+        try:
+            return RefreshTokenKey(uuid.UUID(parts[0]), int(parts[1]))
+        except ValueError:
+            pass
+        claims = decode_segment(parts[1].encode())
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, int):
+            expires_at = None
+        return RefreshTokenKey(uuid.UUID(claims.get("jti")), expires_at)
+    except (jwt.DecodeError, AttributeError, TypeError, ValueError):
+        return None
 
 
 def hash_password(password: str) -> bytes:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+    return password_hashers.hash(password)
 
 
 def verify_password(password: str, hashed_password: bytes) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed_password)
+    return password_hashers.verify(password, hashed_password)
+
+
+async def hash_password_async(password: str) -> bytes:
+    async with auth_scheduler.slot(WorkClass.PASSWORD_HASH):
+        return await password_hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(
+    password: str,
+    hashed_password: bytes,
+) -> bool:
+    async with auth_scheduler.slot(WorkClass.PASSWORD_HASH):
+        return await password_hashing_pool.run(
+            verify_password,
+            password,
+            hashed_password,
+        )
+
+
+def password_needs_rehash(hashed_password: bytes) -> bool:
+    return password_hashers.needs_rehash(hashed_password)
 
 
 def get_token_iat_and_exp(token_type: TokenType) -> dict[str, int]:
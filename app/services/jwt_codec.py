@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+import jwt
+import orjson
+from jwt.algorithms import get_default_algorithms
+
+_algorithms = get_default_algorithms()
+_header_segments: dict[tuple[str, str | None], bytes] = {}
+_known_headers: dict[bytes, dict] = {}
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64url_decode(data: bytes) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+    except binascii.Error:
+        raise jwt.DecodeError("Invalid token segment padding")
+
+
+def get_header_segment(algorithm: str, kid: str | None) -> bytes:
+    """Every token of a key shares the header, so it is encoded once."""
+    header_segment = _header_segments.get((algorithm, kid))
+    if header_segment is None:
+        header: dict[str, Any] = {"alg": algorithm, "typ": "JWT"}
+        if kid:
+            header["kid"] = kid
+        header_segment = b64url_encode(
+            orjson.dumps(header, option=orjson.OPT_SORT_KEYS)
+        )
+        _header_segments[(algorithm, kid)] = header_segment
+        _known_headers[header_segment] = header
+    return header_segment
+
+
+def decode_segment(segment: bytes) -> Any:
+    try:
+        return orjson.loads(b64url_decode(segment))
+    except orjson.JSONDecodeError:
+        raise jwt.DecodeError("Invalid token segment")
+
+
+def decode_header_segment(segment: bytes) -> Any:
+    header = _known_headers.get(segment)
+    if header is None:
+        header = decode_segment(segment)
+    return header
+
+
+def _dump_claims(claims: dict) -> bytes:
+    claims_json = orjson.dumps(claims)
+    if not claims_json.isascii():
+        # PyJWT escapes non-ASCII characters, keep tokens byte-identical.
+        claims_json = json.dumps(claims, separators=(",", ":")).encode()
+    return claims_json
+
+
+def encode_jwt(
+    claims: dict,
+    private_key: Any,
+    algorithm: str,
+    kid: str | None = None,
+) -> str:
+    """
+    Produces the same tokens as `jwt.encode(claims, key, algorithm,
+    headers={"kid": kid})`, but skips PyJWT's generic header handling
+    and uses orjson for the claims.
+    """
+    algorithm_obj = _algorithms[algorithm]
+    signing_input = b".".join(
+        [
+            get_header_segment(algorithm, kid),
+            b64url_encode(_dump_claims(claims)),
+        ]
+    )
+    signature = algorithm_obj.sign(
+        signing_input,
+        algorithm_obj.prepare_key(private_key),
+    )
+    return (signing_input + b"." + b64url_encode(signature)).decode()
+
+
+def verify_jwt_signature(
+    token: str | bytes,
+    public_key: Any,
+    algorithm: str,
+) -> None:
+    if isinstance(token, str):
+        token = token.encode()
+    signing_input, _, signature_segment = token.rpartition(b".")
+    algorithm_obj = _algorithms[algorithm]
+    is_valid = algorithm_obj.verify(
+        signing_input,
+        algorithm_obj.prepare_key(public_key),
+        b64url_decode(signature_segment),
+    )
+    if not is_valid:
+        raise jwt.InvalidSignatureError("Signature verification failed")
@@ -0,0 +1,302 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import orjson
+from cryptography.hazmat.primitives.asymmetric.ec import (
+    EllipticCurvePrivateKey,
+    EllipticCurvePublicKey,
+    SECP256R1,
+)
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey,
+)
+from cryptography.hazmat.primitives.asymmetric.rsa import (
+    RSAPrivateKey,
+    RSAPublicKey,
+)
+from cryptography.hazmat.primitives.asymmetric.types import (
+    PrivateKeyTypes,
+    PublicKeyTypes,
+)
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    PublicFormat,
+    load_pem_private_key,
+    load_pem_public_key,
+)
+from jwt.algorithms import get_default_algorithms
+
+from app.core.config import JWTAuth, settings
+from app.exceptions.key_exceptions import (
+    KeyException,
+    UnsupportedAlgorithm,
+    KeyTypeMismatch,
+)
+
+logger = logging.getLogger(__name__)
+
+RSA_ALGORITHMS = ("RS256", "RS384", "RS512", "PS256", "PS384", "PS512")
+SUPPORTED_ALGORITHMS = (*RSA_ALGORITHMS, "ES256", "EdDSA")
+
+
+def _validate_key_type(
+    key: PrivateKeyTypes | PublicKeyTypes,
+    algorithm: str,
+    path: Path,
+) -> None:
+    if algorithm in RSA_ALGORITHMS:
+        is_valid = isinstance(key, (RSAPrivateKey, RSAPublicKey))
+    elif algorithm == "ES256":
+        is_valid = (
+            isinstance(key, (EllipticCurvePrivateKey, EllipticCurvePublicKey))
+            and isinstance(key.curve, SECP256R1)
+        )
+    elif algorithm == "EdDSA":
+        is_valid = isinstance(key, (Ed25519PrivateKey, Ed25519PublicKey))
+    else:
+        raise UnsupportedAlgorithm(
+            f"Algorithm {algorithm} is not supported, "
+            f"use one of: {', '.join(SUPPORTED_ALGORITHMS)}"
+        )
+    if not is_valid:
+        raise KeyTypeMismatch(
+            f"Key {path} of type {type(key).__name__} "
+            f"can't be used with the {algorithm} algorithm"
+        )
+
+
+def load_private_key(path: Path, algorithm: str) -> PrivateKeyTypes:
+    key = load_pem_private_key(path.read_bytes(), password=None)
+    _validate_key_type(key, algorithm, path)
+    return key
+
+
+def load_public_key(path: Path, algorithm: str) -> PublicKeyTypes:
+    key = load_pem_public_key(path.read_bytes())
+    _validate_key_type(key, algorithm, path)
+    return key
+
+
+def _validate_key_pair(
+    private_key: PrivateKeyTypes,
+    public_key: PublicKeyTypes,
+    private_path: Path,
+    public_path: Path,
+) -> None:
+    """
+    The `kid` comes from the public key, so a half-rotated pair (e.g. only
+    the private key replaced so far) would sign tokens nobody can verify.
+    """
+    def to_der(key: PublicKeyTypes) -> bytes:
+        return key.public_bytes(
+            Encoding.DER, PublicFormat.SubjectPublicKeyInfo
+        )
+
+    if to_der(private_key.public_key()) != to_der(public_key):
+        raise KeyTypeMismatch(
+            f"Keys {private_path} and {public_path} are not a pair"
+        )
+
+
+def _default_algorithm(key: PublicKeyTypes, preferred: str) -> str:
+    """Retiring keys may predate an algorithm change, so guess by key type."""
+    candidates = [preferred, "RS256", "ES256", "EdDSA"]
+    for algorithm in candidates:
+        try:
+            _validate_key_type(key, algorithm, Path())
+        except KeyException:
+            continue
+        return algorithm
+    raise KeyTypeMismatch(f"Unsupported key type {type(key).__name__}")
+
+
+def _jwk_thumbprint(jwk: dict) -> str:
+    """RFC 7638 thumbprint, used as the `kid` of a key."""
+    required_members = {
+        "RSA": ("e", "kty", "n"),
+        "EC": ("crv", "kty", "x", "y"),
+        "OKP": ("crv", "kty", "x"),
+    }[jwk["kty"]]
+    canonical_jwk = orjson.dumps(
+        {member: jwk[member] for member in required_members}
+    )
+    digest = hashlib.sha256(canonical_jwk).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class JWTKey(NamedTuple):
+    kid: str
+    algorithm: str
+    public_key: PublicKeyTypes
+    private_key: PrivateKeyTypes | None
+    jwk: dict
+
+
+def _make_jwt_key(
+    algorithm: str,
+    public_key: PublicKeyTypes,
+    private_key: PrivateKeyTypes | None = None,
+) -> JWTKey:
+    jwk = get_default_algorithms()[algorithm].to_jwk(public_key, as_dict=True)
+    kid = _jwk_thumbprint(jwk)
+    jwk.update(kid=kid, alg=algorithm, use="sig")
+    return JWTKey(kid, algorithm, public_key, private_key, jwk)
+
+
+class KeyRing:
+    """
+    Keys of a single token type: the active one signs new tokens,
+    retiring ones are only used to verify tokens issued before rotation.
+    """
+
+    def __init__(self, active_key: JWTKey, retiring_keys: list[JWTKey]):
+        self.active_key = active_key
+        self.keys = {key.kid: key for key in retiring_keys}
+        self.keys[active_key.kid] = active_key
+
+    def get(self, kid: str | None) -> JWTKey | None:
+        if kid is None:
+            return self.active_key
+        return self.keys.get(kid)
+
+
+class JWTKeyProvider:
+    """
+    Keeps deserialized keys for every token type in key rings indexed
+    by `kid`, so PEM files are parsed once instead of on every
+    jwt.encode/jwt.decode and keys can be rotated without a restart.
+
+    Keys are loaded on first use (or explicitly in the app lifespan) and
+    `watch()` reloads them whenever the files in `certs_path` change. The
+    old keys are kept until the new private and public key form a pair.
+
+    Rotation: put the new pair in place of `<token_type>_private.pem` /
+    `<token_type>_public.pem`, keep the previous public key as
+    `<token_type>_public.<any suffix>.pem` until the tokens signed with it
+    expire.
+    """
+
+    def __init__(self, config: JWTAuth):
+        self.config = config
+        self._key_rings: dict[str, KeyRing] = {}
+        self._jwks: tuple[bytes, str] = (b"", "")
+        self._files_state: tuple = ()
+        self._reload_listeners: list[Callable[[], None]] = []
+        self._lock = threading.RLock()
+
+    def _get_files_state(self) -> tuple:
+        paths = [
+            self.config.access_private_key_path,
+            self.config.access_public_key_path,
+            self.config.refresh_private_key_path,
+            self.config.refresh_public_key_path,
+            *self.config.certs_path.glob("*_public.*.pem"),
+        ]
+        state = []
+        for path in sorted(paths):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            state.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(state)
+
+    def _load_key_ring(self, token_type: str) -> KeyRing:
+        algorithm = self.get_algorithm(token_type)
+        public_path = getattr(self.config, f"{token_type}_public_key_path")
+        private_path = getattr(self.config, f"{token_type}_private_key_path")
+        public_key = load_public_key(public_path, algorithm)
+        private_key = load_private_key(private_path, algorithm)
+        _validate_key_pair(private_key, public_key, private_path, public_path)
+        active_key = _make_jwt_key(algorithm, public_key, private_key)
+        retiring_keys = []
+        for path in sorted(
+            self.config.certs_path.glob(f"{token_type}_public.*.pem")
+        ):
+            public_key = load_pem_public_key(path.read_bytes())
+            retiring_keys.append(
+                _make_jwt_key(
+                    _default_algorithm(public_key, algorithm),
+                    public_key,
+                )
+            )
+        return KeyRing(active_key, retiring_keys)
+
+    def load(self) -> None:
+        with self._lock:
+            files_state = self._get_files_state()
+            key_rings = {
+                "access": self._load_key_ring("access"),
+                "refresh": self._load_key_ring("refresh"),
+            }
+            jwks = [key.jwk for key in key_rings["access"].keys.values()]
+            jwks_body = orjson.dumps({"keys": jwks})
+            etag = f'"{hashlib.sha256(jwks_body).hexdigest()[:32]}"'
+            self._jwks = (jwks_body, etag)
+            self._files_state = files_state
+            self._key_rings = key_rings
+
+    def _get_key_rings(self) -> dict[str, KeyRing]:
+        if not self._key_rings:
+            with self._lock:
+                if not self._key_rings:
+                    self.load()
+        return self._key_rings
+
+    def reload(self) -> None:
+        self.load()
+        for listener in self._reload_listeners:
+            listener()
+
+    def reload_if_changed(self) -> bool:
+        if self._get_files_state() == self._files_state:
+            return False
+        self.reload()
+        return True
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.reload_if_changed):
+                    logger.info(
+                        "JWT keys reloaded from %s", self.config.certs_path
+                    )
+            except Exception:
+                logger.exception("Failed to reload JWT keys, keeping old ones")
+
+    def add_reload_listener(self, listener: Callable[[], None]) -> None:
+        self._reload_listeners.append(listener)
+
+    def get_algorithm(self, token_type: str) -> str:
+        return getattr(self.config, f"{token_type}_algorithm")
+
+    def get_signing_key(self, token_type: str) -> JWTKey:
+        return self._get_key_rings()[token_type].active_key
+
+    def get_verification_key(
+        self,
+        token_type: str,
+        kid: str | None,
+    ) -> JWTKey | None:
+        return self._get_key_rings()[token_type].get(kid)
+
+    def get_private_key(self, token_type: str) -> PrivateKeyTypes:
+        return self.get_signing_key(token_type).private_key  # type: ignore
+
+    def get_public_key(self, token_type: str) -> PublicKeyTypes:
+        return self.get_signing_key(token_type).public_key
+
+    def get_jwks(self) -> tuple[bytes, str]:
+        """Serialized JWKS of the access token keys and its ETag."""
+        self._get_key_rings()
+        return self._jwks
+
+
+jwt_key_provider = JWTKeyProvider(settings.auth)
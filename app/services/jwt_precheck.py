@@ -0,0 +1,101 @@
+import time
+from collections import Counter
+from enum import StrEnum
+
+import jwt
+
+from app.services.jwt_codec import decode_header_segment, decode_segment
+from app.services.jwt_key_service import SUPPORTED_ALGORITHMS
+
+
+class RejectionReason(StrEnum):
+    MALFORMED = "malformed"
+    ALGORITHM = "algorithm"
+    UNKNOWN_KEY = "unknown_key"
+    EXPIRED = "expired"
+    IMMATURE = "immature"
+    TOKEN_TYPE = "token_type"
+
+
+rejections: Counter[RejectionReason] = Counter()
+
+
+def reject(
+    reason: RejectionReason,
+    error: jwt.InvalidTokenError,
+) -> jwt.InvalidTokenError:
+    rejections[reason] += 1
+    return error
+
+
+def reject_algorithm() -> jwt.InvalidTokenError:
+    return reject(
+        RejectionReason.ALGORITHM,
+        jwt.InvalidAlgorithmError("The specified alg value is not allowed"),
+    )
+
+
+def _decode_segment(segment: bytes, is_header: bool = False) -> dict:
+    try:
+        if is_header:
+            decoded = decode_header_segment(segment)
+        else:
+            decoded = decode_segment(segment)
+    except jwt.DecodeError as error:
+        raise reject(RejectionReason.MALFORMED, error)
+    if not isinstance(decoded, dict):
+        raise reject(
+            RejectionReason.MALFORMED,
+            jwt.DecodeError("Token segment is not a JSON object"),
+        )
+    return decoded
+
+
+def precheck_jwt(
+    token: str | bytes,
+    token_type: str,
+    leeway: int = 0,
+) -> tuple[dict, dict]:
+    """
+    Validates everything that can be checked without a public-key operation:
+    the token structure, the header algorithm and the unverified claims.
+    Returns the unverified header and payload. The signature still has
+    to be verified by the caller.
+    """
+    if isinstance(token, str):
+        token = token.encode()
+    segments = token.split(b".")
+    if len(segments) != 3 or not all(segments):
+        raise reject(
+            RejectionReason.MALFORMED,
+            jwt.DecodeError("Not enough or too many segments"),
+        )
+    header = _decode_segment(segments[0], is_header=True)
+    payload = _decode_segment(segments[1])
+
+    if header.get("alg") not in SUPPORTED_ALGORITHMS:
+        raise reject_algorithm()
+
+    now = time.time()
+    exp, iat = payload.get("exp"), payload.get("iat")
+    if not isinstance(exp, int) or not isinstance(iat, int):
+        raise reject(
+            RejectionReason.MALFORMED,
+            jwt.MissingRequiredClaimError("exp"),
+        )
+    if exp <= now - leeway:
+        raise reject(
+            RejectionReason.EXPIRED,
+            jwt.ExpiredSignatureError("Signature has expired"),
+        )
+    if iat > now + leeway:
+        raise reject(
+            RejectionReason.IMMATURE,
+            jwt.ImmatureSignatureError("The token is not yet valid (iat)"),
+        )
+    if payload.get("token_type") != token_type:
+        raise reject(
+            RejectionReason.TOKEN_TYPE,
+            jwt.InvalidTokenError("Invalid token type"),
+        )
+    return header, payload
@@ -0,0 +1,292 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+from abc import ABC, abstractmethod
+
+import bcrypt
+
+from app.core.config import PasswordHashing
+
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _parse_params(params: bytes) -> dict[str, int]:
+    return {
+        key.decode(): int(value)
+        for key, value in (item.split(b"=") for item in params.split(b","))
+    }
+
+
+class PasswordHasher(ABC):
+    algorithm: str
+    identifiers: tuple[bytes, ...]
+
+    def __init__(self, config: PasswordHashing):
+        self.config = config
+
+    @abstractmethod
+    def hash(self, password: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def verify(self, password: str, hashed_password: bytes) -> bool:
+        ...
+
+    @abstractmethod
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        """Whether the hash was made with other than the current params."""
+
+    @abstractmethod
+    def cost_profile(self) -> dict[str, int]:
+        """Current tunable params and the memory needed for a single hash."""
+
+    def benchmark(self, iterations: int = 3) -> float:
+        """Returns the average time (in seconds) of hash + verify."""
+        password = "benchmark-password"
+        started = time.perf_counter()
+        for _ in range(iterations):
+            self.verify(password, self.hash(password))
+        return (time.perf_counter() - started) / iterations
+
+
+class BcryptHasher(PasswordHasher):
+    algorithm = "bcrypt"
+    identifiers = (b"2a", b"2b", b"2y")
+
+    def hash(self, password: str) -> bytes:
+        salt = bcrypt.gensalt(rounds=self.config.bcrypt_rounds)
+        return bcrypt.hashpw(password.encode(), salt)
+
+    def verify(self, password: str, hashed_password: bytes) -> bool:
+        return bcrypt.checkpw(password.encode(), hashed_password)
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        """
+        Weaker hashes are always upgraded, stronger ones are only
+        downgraded beyond `bcrypt_rounds_tolerance`, so workers whose
+        calibration picked neighbouring costs don't rehash back and forth.
+        """
+        try:
+            rounds = int(hashed_password.split(b"$")[2])
+        except (IndexError, ValueError):
+            return True
+        active_rounds = self.config.bcrypt_rounds
+        return not (
+            active_rounds
+            <= rounds
+            <= active_rounds + self.config.bcrypt_rounds_tolerance
+        )
+
+    def cost_profile(self) -> dict[str, int]:
+        return {
+            "rounds": self.config.bcrypt_rounds,
+            "memory_bytes": 4 * 1024,
+        }
+
+
+class ScryptHasher(PasswordHasher):
+    algorithm = "scrypt"
+    identifiers = (b"scrypt",)
+    salt_size = 16
+    key_size = 32
+
+    @staticmethod
+    def _maxmem(n: int, r: int, p: int) -> int:
+        return 128 * r * (n + p + 2) + 1024 * 1024
+
+    def _derive(
+        self,
+        password: str,
+        salt: bytes,
+        n: int,
+        r: int,
+        p: int,
+    ) -> bytes:
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=self._maxmem(n, r, p),
+            dklen=self.key_size,
+        )
+
+    def _current_params(self) -> tuple[int, int, int]:
+        return self.config.scrypt_n, self.config.scrypt_r, self.config.scrypt_p
+
+    def hash(self, password: str) -> bytes:
+        n, r, p = self._current_params()
+        salt = os.urandom(self.salt_size)
+        key = self._derive(password, salt, n, r, p)
+        params = f"ln={n.bit_length() - 1},r={r},p={p}".encode()
+        return b"$".join(
+            [b"", b"scrypt", params, _b64encode(salt), _b64encode(key)]
+        )
+
+    def _split(self, hashed_password: bytes) -> tuple[dict, bytes, bytes]:
+        _, _, params, salt, key = hashed_password.split(b"$")
+        return _parse_params(params), _b64decode(salt), _b64decode(key)
+
+    def verify(self, password: str, hashed_password: bytes) -> bool:
+        params, salt, key = self._split(hashed_password)
+        derived_key = self._derive(
+            password, salt, 1 << params["ln"], params["r"], params["p"]
+        )
+        return hmac.compare_digest(derived_key, key)
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        params, _, _ = self._split(hashed_password)
+        stored_params = (1 << params["ln"], params["r"], params["p"])
+        return stored_params != self._current_params()
+
+    def cost_profile(self) -> dict[str, int]:
+        n, r, p = self._current_params()
+        return {"n": n, "r": r, "p": p, "memory_bytes": 128 * n * r}
+
+
+class Pbkdf2Sha256Hasher(PasswordHasher):
+    algorithm = "pbkdf2_sha256"
+    identifiers = (b"pbkdf2-sha256",)
+    salt_size = 16
+
+    def _derive(self, password: str, salt: bytes, iterations: int) -> bytes:
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, iterations
+        )
+
+    def hash(self, password: str) -> bytes:
+        iterations = self.config.pbkdf2_iterations
+        salt = os.urandom(self.salt_size)
+        key = self._derive(password, salt, iterations)
+        return b"$".join(
+            [
+                b"",
+                b"pbkdf2-sha256",
+                f"i={iterations}".encode(),
+                _b64encode(salt),
+                _b64encode(key),
+            ]
+        )
+
+    def _split(self, hashed_password: bytes) -> tuple[dict, bytes, bytes]:
+        _, _, params, salt, key = hashed_password.split(b"$")
+        return _parse_params(params), _b64decode(salt), _b64decode(key)
+
+    def verify(self, password: str, hashed_password: bytes) -> bool:
+        params, salt, key = self._split(hashed_password)
+        derived_key = self._derive(password, salt, params["i"])
+        return hmac.compare_digest(derived_key, key)
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        params, _, _ = self._split(hashed_password)
+        return params["i"] != self.config.pbkdf2_iterations
+
+    def cost_profile(self) -> dict[str, int]:
+        return {"iterations": self.config.pbkdf2_iterations, "memory_bytes": 0}
+
+
+class PasswordHasherRegistry:
+    def __init__(self, config: PasswordHashing):
+        self.config = config
+        self._hashers: dict[str, PasswordHasher] = {}
+        self._by_identifier: dict[bytes, PasswordHasher] = {}
+
+    def register(self, hasher: PasswordHasher) -> None:
+        self._hashers[hasher.algorithm] = hasher
+        for identifier in hasher.identifiers:
+            self._by_identifier[identifier] = hasher
+
+    def get(self, algorithm: str) -> PasswordHasher:
+        return self._hashers[algorithm]
+
+    @property
+    def default(self) -> PasswordHasher:
+        return self._hashers[self.config.default_algorithm]
+
+    def identify(self, hashed_password: bytes) -> PasswordHasher | None:
+        parts = hashed_password.split(b"$", 2)
+        if len(parts) < 3 or parts[0]:
+            return None
+        return self._by_identifier.get(parts[1])
+
+    def hash(self, password: str) -> bytes:
+        return self.default.hash(password)
+
+    def verify(self, password: str, hashed_password: bytes) -> bool:
+        hasher = self.identify(hashed_password)
+        if hasher is None:
+            return False
+        try:
+            return hasher.verify(password, hashed_password)
+        except (KeyError, ValueError):
+            return False
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        hasher = self.identify(hashed_password)
+        if hasher is not self.default:
+            return True
+        try:
+            return hasher.needs_rehash(hashed_password)
+        except (KeyError, ValueError):
+            return True
+
+
+def build_password_hasher_registry(
+    config: PasswordHashing,
+) -> PasswordHasherRegistry:
+    registry = PasswordHasherRegistry(config)
+    registry.register(BcryptHasher(config))
+    registry.register(ScryptHasher(config))
+    registry.register(Pbkdf2Sha256Hasher(config))
+    return registry
+
+
+def _calibrate_bcrypt_rounds_once(
+    target_ms: int,
+    min_rounds: int,
+    max_rounds: int,
+) -> int:
+    password = b"calibration-password"
+    rounds = min_rounds
+    while rounds < max_rounds:
+        started = time.perf_counter()
+        bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > target_ms:
+            return max(rounds - 1, min_rounds)
+        if elapsed_ms * 2 > target_ms:
+            return rounds
+        rounds += 1
+    return max_rounds
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: int,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+    samples: int = 1,
+) -> int:
+    """
+    Returns the highest bcrypt cost whose hashing time on this machine
+    does not exceed `target_ms` (but not less than `min_rounds`).
+    Each extra round doubles the work, so the measurement stops as soon
+    as the next round is expected to overshoot the target. The result
+    is the highest of `samples` measurements, which keeps workers that
+    calibrate on their own from landing on different costs by noise.
+    """
+    return max(
+        _calibrate_bcrypt_rounds_once(target_ms, min_rounds, max_rounds)
+        for _ in range(max(samples, 1))
+    )
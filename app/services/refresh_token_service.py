@@ -1,12 +1,95 @@
 import hashlib
+import hmac
+import uuid
+from datetime import datetime, UTC
+from typing import NamedTuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.dependencies import invalidation_bus
 from app.models import RefreshTokenModel
 from app.repositories.refresh_token_repository import refresh_token_repo
 from app.schemas.device_info_schema import SDeviceInfo
 from app.schemas.refresh_token_schema import SRefreshToken
+from app.services.auth_service import (
+    TokenType,
+    get_refresh_token_key,
+)
+
+
+class CachedRefreshToken(NamedTuple):
+    user_id: int
+    created_at: int
+    expires_at: int
+    username: str | None = None
+
+
+REFRESH_TOKENS_TOPIC = "refresh_tokens"
+
+# Known-valid tokens by hash. Deletes invalidate the entries right away in
+# this process and through the invalidation bus in the others, the
+# staleness bound covers the time a listener is disconnected.
+refresh_token_cache: TTLCache[bytes, CachedRefreshToken] = TTLCache(
+    maxsize=settings.auth.refresh_token_cache_size,
+)
+
+
+def _cache_refresh_token(
+    token_in_db: RefreshTokenModel,
+    generation: int,
+    username: str | None = None,
+) -> CachedRefreshToken:
+    """
+    `generation` is the cache generation read before the row was, a token
+    revoked while it was being read is not cached again.
+    """
+    cached_token = CachedRefreshToken(
+        user_id=token_in_db.user_id,
+        created_at=token_in_db.created_at,
+        expires_at=token_in_db.expires_at,
+        username=username,
+    )
+    refresh_token_cache.set(
+        token_in_db.token_hash,
+        cached_token,
+        min(
+            token_in_db.expires_at,
+            refresh_token_cache.clock()
+            + settings.auth.refresh_token_cache_max_staleness_sec,
+        ),
+        generation,
+    )
+    return cached_token
+
+
+def _invalidate_cached_tokens(token_hashes: list[bytes]) -> None:
+    for token_hash in token_hashes:
+        refresh_token_cache.invalidate(token_hash)
+
+
+def _on_invalidated_tokens(keys: list[str]) -> None:
+    _invalidate_cached_tokens([bytes.fromhex(key) for key in keys])
+
+
+invalidation_bus.subscribe(
+    REFRESH_TOKENS_TOPIC,
+    on_keys=_on_invalidated_tokens,
+    on_flush=refresh_token_cache.clear,
+)
+
+
+async def _publish_deleted_tokens(
+    session: AsyncSession,
+    token_hashes: list[bytes],
+) -> None:
+    if token_hashes and settings.invalidation.enabled:
+        await invalidation_bus.publish(
+            session,
+            REFRESH_TOKENS_TOPIC,
+            [token_hash.hex() for token_hash in token_hashes],
+        )
 
 
 async def add_refresh_token_to_db(
@@ -16,13 +99,23 @@ async def add_refresh_token_to_db(
     created_at: int,
     expires_at: int,
     device_info: SDeviceInfo,
+    session_id: uuid.UUID | None = None,
 ) -> None:
-
-    all_user_sessions = await _get_all_user_auth_sessions(session, user_id)
-    if len(all_user_sessions) >= settings.auth.max_active_auth_sessions:
-        await _delete_all_user_auth_sessions(session, all_user_sessions)
-
-    await _delete_same_device_auth_sessions(session, user_id, device_info)
+    """
+    Evicts the outdated sessions and stores the new one in a single
+    transaction, the number of statements does not depend on the number
+    of the existing sessions.
+    """
+    deleted_hashes = await _delete_same_device_auth_sessions(
+        session,
+        user_id,
+        device_info,
+    )
+    deleted_hashes += await _delete_oldest_user_auth_sessions(
+        session,
+        user_id,
+        keep=settings.auth.max_active_auth_sessions - 1,
+    )
 
     token_scheme = SRefreshToken(
         user_id=user_id,
@@ -32,47 +125,41 @@ async def add_refresh_token_to_db(
         device_info=device_info,
     )
 
-    await refresh_token_repo.add(session, token_scheme.model_dump())
+    token_in_db = token_scheme.model_dump()
+    if session_id is not None:
+        token_in_db["id"] = session_id
+    await refresh_token_repo.add(session, token_in_db, commit=False)
+    await _publish_deleted_tokens(session, deleted_hashes)
+    await session.commit()
+    _invalidate_cached_tokens(deleted_hashes)
 
 
-def _hash_token(token: str) -> str:
-    return hashlib.sha256(token.encode()).hexdigest()
+def _hash_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 
 async def _delete_same_device_auth_sessions(
     session: AsyncSession,
     user_id: int,
     device_info: SDeviceInfo,
-):
-    same_device_auth_sessions = await _get_same_device_auth_sessions(
+) -> list[bytes]:
+    return await refresh_token_repo.delete_by_device_info(
         session,
-        user_id,
-        device_info,
+        user_id=user_id,
+        device_info=device_info,
     )
-    if same_device_auth_sessions:
-        for auth_session in same_device_auth_sessions:
-            await refresh_token_repo.delete(session, auth_session.id)
 
 
-async def _delete_all_user_auth_sessions(
-    session: AsyncSession,
-    user_sessions: list[RefreshTokenModel],
-):
-    for auth_session in user_sessions:
-        await refresh_token_repo.delete(session, auth_session.id)
-
-
-async def _get_same_device_auth_sessions(
+async def _delete_oldest_user_auth_sessions(
     session: AsyncSession,
     user_id: int,
-    device_info: SDeviceInfo,
-) -> list[RefreshTokenModel]:
-    sessions = await refresh_token_repo.get_tokens_by_device_info(
+    keep: int = 0,
+) -> list[bytes]:
+    return await refresh_token_repo.delete_oldest(
         session,
         user_id=user_id,
-        device_info=device_info,
+        keep=max(keep, 0),
     )
-    return sessions
 
 
 async def _get_all_user_auth_sessions(
@@ -82,25 +169,80 @@ async def _get_all_user_auth_sessions(
     return await refresh_token_repo.get_all(session, dict(user_id=user_id))
 
 
+def _token_lookup_params(token: str) -> dict:
+    """
+    Tokens carrying a session id are fetched by the primary key, older
+    ones by their hash. The expiry, when known, lets a partitioned
+    refresh_tokens table prune the lookup to a single partition.
+    """
+    if (token_key := get_refresh_token_key(token)) is None:
+        return {"token_hash": _hash_token(token)}
+    if token_key.expires_at is None:
+        return {"id": token_key.session_id}
+    return {"id": token_key.session_id, "expires_at": token_key.expires_at}
+
+
+def _is_same_token(token_in_db: RefreshTokenModel, token: str) -> bool:
+    return hmac.compare_digest(token_in_db.token_hash, _hash_token(token))
+
+
 async def check_token_in_db(
     session: AsyncSession,
     token: str,
 ) -> bool:
-    token_hash = _hash_token(token)
+    if refresh_token_cache.get(_hash_token(token)) is not None:
+        return True
+    generation = refresh_token_cache.generation
     token_in_db = await refresh_token_repo.get_by_filter(
         session,
-        {"token_hash": token_hash}
+        _token_lookup_params(token),
     )
-    return bool(token_in_db)
+    if token_in_db is None or not _is_same_token(token_in_db, token):
+        return False
+    _cache_refresh_token(token_in_db, generation)
+    return True
+
+
+async def get_refresh_token_payload_from_db(
+    session: AsyncSession,
+    token: str,
+) -> dict | None:
+    cached_token = refresh_token_cache.get(_hash_token(token))
+    if cached_token is None or cached_token.username is None:
+        generation = refresh_token_cache.generation
+        token_with_username = await refresh_token_repo.get_with_username(
+            session,
+            **_token_lookup_params(token),
+        )
+        if token_with_username is None:
+            return None
+        token_in_db, username = token_with_username
+        if not _is_same_token(token_in_db, token):
+            return None
+        cached_token = _cache_refresh_token(
+            token_in_db, generation, username
+        )
+    if cached_token.expires_at <= int(datetime.now(UTC).timestamp()):
+        return None
+    return {
+        "sub": cached_token.username,
+        "iat": cached_token.created_at,
+        "exp": cached_token.expires_at,
+        "token_type": TokenType.REFRESH,
+    }
 
 
 async def delete_refresh_token_from_db(
     session: AsyncSession,
     token: str,
 ) -> None:
-    token_in_db = await refresh_token_repo.get_by_filter(
+    token_hash = _hash_token(token)
+    deleted = await refresh_token_repo.delete_by_filter(
         session,
-        {"token_hash": _hash_token(token)},
+        {**_token_lookup_params(token), "token_hash": token_hash},
+        commit=False,
     )
-    if token_in_db:
-        await refresh_token_repo.delete(session, token_in_db.id)
+    if deleted:
+        await _publish_deleted_tokens(session, [token_hash])
+    await session.commit()
+    refresh_token_cache.invalidate(token_hash)
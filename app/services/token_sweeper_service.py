@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, UTC
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    settings,
+    RefreshTokenPartitioning,
+    TokenSweeper,
+)
+from app.db.dependencies import database_manager
+from app.db.locks import try_advisory_xact_lock
+from app.db.partitions import (
+    create_range_partitions,
+    drop_range_partitions_before,
+    is_partitioned,
+)
+from app.models import RefreshTokenModel
+from app.repositories.refresh_token_repository import refresh_token_repo
+
+logger = logging.getLogger(__name__)
+
+SECS_IN_DAY = 60 * 60 * 24
+
+sweeper_stats: Counter[str] = Counter()
+
+
+async def purge_expired_refresh_tokens(
+    session: AsyncSession,
+    config: TokenSweeper = settings.sweeper,
+    now: int | None = None,
+) -> int | None:
+    """
+    Deletes expired refresh tokens in batches of `config.batch_size`,
+    pausing between them. Every batch runs in its own transaction under
+    an advisory lock, so only one worker sweeps at a time. Returns the
+    number of purged rows, or None if another worker holds the lock.
+    """
+    if now is None:
+        now = int(datetime.now(UTC).timestamp())
+    purged = 0
+    while True:
+        if not await try_advisory_xact_lock(session, config.advisory_lock_key):
+            await session.rollback()
+            return purged or None
+        deleted = await refresh_token_repo.delete_expired(
+            session,
+            now=now,
+            limit=config.batch_size,
+        )
+        await session.commit()
+        purged += deleted
+        if deleted < config.batch_size:
+            return purged
+        await asyncio.sleep(config.batch_pause_sec)
+
+
+async def maintain_refresh_token_partitions(
+    session: AsyncSession,
+    config: RefreshTokenPartitioning = settings.partitioning,
+    lock_key: int = settings.sweeper.advisory_lock_key,
+    now: int | None = None,
+) -> tuple[list[str], list[str]] | None:
+    """
+    Creates the partitions for every expiry a refresh token issued now
+    can have (plus `config.premake` spare ones) and drops the partitions
+    that only hold expired tokens. Returns the created and the dropped
+    partition names, or None if another worker holds the lock.
+    """
+    if now is None:
+        now = int(datetime.now(UTC).timestamp())
+    if not await try_advisory_xact_lock(session, lock_key):
+        await session.rollback()
+        return None
+    table = RefreshTokenModel.__tablename__
+    if not await is_partitioned(session, table):
+        await session.rollback()
+        return [], []
+    interval = config.interval_days * SECS_IN_DAY
+    horizon = (
+        now
+        + settings.auth.refresh_token_expires_days * SECS_IN_DAY
+        + config.premake * interval
+    )
+    created = await create_range_partitions(
+        session, table, now, horizon, interval
+    )
+    dropped = await drop_range_partitions_before(
+        session, table, now, config.drop_lock_timeout_ms
+    )
+    await session.commit()
+    return created, dropped
+
+
+async def run_refresh_token_sweeper(
+    config: TokenSweeper = settings.sweeper,
+) -> None:
+    while True:
+        # a failed partition maintenance must not stop the purge
+        try:
+            async with database_manager.session_factory() as session:
+                await _maintain_partitions(session, config)
+        except Exception:
+            sweeper_stats["partition_failures"] += 1
+            logger.exception("Failed to maintain refresh token partitions")
+        try:
+            async with database_manager.session_factory() as session:
+                purged = await purge_expired_refresh_tokens(session, config)
+        except Exception:
+            logger.exception("Failed to purge expired refresh tokens")
+        else:
+            sweeper_stats["runs"] += 1
+            if purged is None:
+                sweeper_stats["skipped"] += 1
+            else:
+                sweeper_stats["purged"] += purged
+                logger.info("Purged %d expired refresh tokens", purged)
+        await asyncio.sleep(config.interval_sec)
+
+
+async def _maintain_partitions(
+    session: AsyncSession,
+    config: TokenSweeper,
+) -> None:
+    partitions = await maintain_refresh_token_partitions(
+        session,
+        lock_key=config.advisory_lock_key,
+    )
+    if partitions is None:
+        return
+    created, dropped = partitions
+    sweeper_stats["partitions_created"] += len(created)
+    sweeper_stats["partitions_dropped"] += len(dropped)
+    if created or dropped:
+        logger.info(
+            "Refresh token partitions created: %s, dropped: %s",
+            created,
+            dropped,
+        )
@@ -1,6 +1,10 @@
+import logging
+
 from pydantic import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.db.dependencies import invalidation_bus
 from app.exceptions.user_exceptions import (
     UsernameAlreadyExists,
     EmailAlreadyExists,
@@ -8,6 +12,28 @@ from app.exceptions.user_exceptions import (
 from app.models import UserModel
 from app.repositories import user_repo
 from app.schemas.user_schemas import SUserSignUp
+from app.services.auth_service import user_claims_versions
+
+logger = logging.getLogger(__name__)
+
+USER_CLAIMS_TOPIC = "user_claims"
+
+
+def _on_changed_user_claims(keys: list[str]) -> None:
+    for key in keys:
+        try:
+            user_id, claims_version = key.split(":", 1)
+            user_claims_versions.set(int(user_id), int(claims_version))
+        except (AttributeError, ValueError):
+            logger.warning("Malformed user claims key: %.100r", key)
+
+
+invalidation_bus.subscribe(
+    USER_CLAIMS_TOPIC,
+    on_keys=_on_changed_user_claims,
+    # changes may have been missed, distrust every token issued until now
+    on_flush=user_claims_versions.reset,
+)
 
 
 async def create_user(user: SUserSignUp, session: AsyncSession) -> UserModel:
@@ -27,6 +53,38 @@ async def get_user_by_username(
     return await user_repo.get_by_filter(session, {"username": username})
 
 
+async def update_user_password(
+    user_id: int,
+    password: bytes,
+    session: AsyncSession,
+) -> UserModel | None:
+    return await user_repo.update(session, user_id, {"password": password})
+
+
+async def update_user_claims(
+    user_id: int,
+    values: dict,
+    session: AsyncSession,
+) -> int | None:
+    """
+    Updates what access tokens embed (e.g. `email` or `active`). Tokens
+    issued before fall back to the DB in every process, refreshed ones
+    carry the new `claims_version`.
+    """
+    claims_version = await user_repo.update_claims(session, user_id, values)
+    if claims_version is None:
+        return None
+    if settings.invalidation.enabled:
+        await invalidation_bus.publish(
+            session,
+            USER_CLAIMS_TOPIC,
+            [f"{user_id}:{claims_version}"],
+        )
+    await session.commit()
+    user_claims_versions.set(user_id, claims_version)
+    return claims_version
+
+
 async def _check_unique_username(username: str, session: AsyncSession) -> bool:
     user = await get_user_by_username(username, session)
     if user is None:
@@ -0,0 +1,67 @@
+"""
+Compares the CPU cost of the login path (sign an access and a refresh
+token) and the refresh path (verify a refresh token, sign an access
+token) for every supported signing algorithm family.
+
+Usage (from the project root):
+    python -m benchmarks.bench_jwt_algorithms
+"""
+import os
+import time
+
+os.environ.setdefault("MODE", "DEV")
+os.environ.setdefault("DB__URL", "postgresql+psycopg://u:p@localhost/db")
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa  # noqa
+
+from app.services.auth_service import (  # noqa: E402
+    TokenType,
+    _create_jwt,
+    _decode_jwt,
+)
+
+ITERATIONS = 300
+
+KEY_FACTORIES = {
+    "RS256": lambda: rsa.generate_private_key(65537, 2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def _ops_per_sec(algorithm: str) -> tuple[float, float]:
+    access_key = KEY_FACTORIES[algorithm]()
+    refresh_key = KEY_FACTORIES[algorithm]()
+    payload = {"sub": "benchmark"}
+
+    def sign(token_type: TokenType, key) -> str:
+        return _create_jwt(payload, token_type, key, 0, 2 ** 40, algorithm)
+
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        sign(TokenType.ACCESS, access_key)
+        sign(TokenType.REFRESH, refresh_key)
+    login_rate = ITERATIONS / (time.perf_counter() - started)
+
+    refresh_token = sign(TokenType.REFRESH, refresh_key)
+    refresh_public_key = refresh_key.public_key()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        _decode_jwt(
+            refresh_token, TokenType.REFRESH, refresh_public_key, algorithm
+        )
+        sign(TokenType.ACCESS, access_key)
+    refresh_rate = ITERATIONS / (time.perf_counter() - started)
+
+    return login_rate, refresh_rate
+
+
+def main() -> None:
+    print(f"{'algorithm':<10} {'logins/s':>10} {'refreshes/s':>12}")
+    for algorithm in KEY_FACTORIES:
+        login_rate, refresh_rate = _ops_per_sec(algorithm)
+        print(f"{algorithm:<10} {login_rate:>10.0f} {refresh_rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
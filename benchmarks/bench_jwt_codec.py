@@ -0,0 +1,77 @@
+"""
+Measures how much time token encoding and decoding spend outside of the
+signature itself, for PyJWT and for the specialised codec used by the app.
+
+HS256 with a short secret is used as the signing algorithm: its HMAC takes
+about a microsecond, so the timings are almost entirely codec overhead
+(JSON, base64, header handling, claim checks) which is the same for the
+asymmetric algorithms the app actually uses.
+
+Usage (from the project root):
+    python -m benchmarks.bench_jwt_codec
+"""
+import os
+import time
+import timeit
+from typing import Callable
+
+os.environ.setdefault("MODE", "DEV")
+os.environ.setdefault("DB__URL", "postgresql+psycopg://u:p@localhost/db")
+
+import jwt  # noqa: E402
+
+from app.services.jwt_codec import (  # noqa: E402
+    decode_header_segment,
+    decode_segment,
+    encode_jwt,
+    verify_jwt_signature,
+)
+
+ITERATIONS = 5000
+REPEATS = 5
+ALGORITHM = "HS256"
+SECRET = b"benchmark-secret-benchmark-secret"
+
+
+def _usec_per_op(func: Callable[[], object]) -> float:
+    best = min(timeit.repeat(func, number=ITERATIONS, repeat=REPEATS))
+    return best / ITERATIONS * 10 ** 6
+
+
+def main() -> None:
+    now = int(time.time())
+    claims = {
+        "sub": "benchmark",
+        "iat": now,
+        "exp": now + 900,
+        "token_type": "access",
+    }
+    kid = "benchmark-kid"
+    token = encode_jwt(claims, SECRET, ALGORITHM, kid)
+    assert token == jwt.encode(claims, SECRET, ALGORITHM, {"kid": kid})
+
+    def codec_decode() -> dict:
+        header_segment, payload_segment, _ = token.encode().split(b".")
+        decode_header_segment(header_segment)
+        payload = decode_segment(payload_segment)
+        verify_jwt_signature(token, SECRET, ALGORITHM)
+        return payload
+
+    results = {
+        "encode, PyJWT": _usec_per_op(
+            lambda: jwt.encode(claims, SECRET, ALGORITHM, {"kid": kid})
+        ),
+        "encode, codec": _usec_per_op(
+            lambda: encode_jwt(claims, SECRET, ALGORITHM, kid)
+        ),
+        "decode, PyJWT": _usec_per_op(
+            lambda: jwt.decode(token, SECRET, [ALGORITHM])
+        ),
+        "decode, codec": _usec_per_op(codec_decode),
+    }
+    for name, usec in results.items():
+        print(f"{name:<14} {usec:6.1f} usec/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares JWT throughput when keys are passed to PyJWT as PEM text
+(parsed on every call) and as preparsed `cryptography` key objects.
+
+Usage (from the project root, with generated certs):
+    python -m benchmarks.bench_jwt_keys
+"""
+import os
+import time
+from typing import Callable
+
+os.environ.setdefault("MODE", "DEV")
+os.environ.setdefault("DB__URL", "postgresql+psycopg://u:p@localhost/db")
+
+import jwt  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.jwt_key_service import jwt_key_provider  # noqa: E402
+
+ITERATIONS = 500
+
+
+def _tokens_per_sec(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return ITERATIONS / (time.perf_counter() - started)
+
+
+def main() -> None:
+    payload = {"sub": "benchmark", "iat": 0, "exp": 2 ** 40}
+    for token_type in ("access", "refresh"):
+        algorithm = jwt_key_provider.get_algorithm(token_type)
+        private_pem = getattr(
+            settings.auth, f"{token_type}_private_key_path"
+        ).read_text()
+        public_pem = getattr(
+            settings.auth, f"{token_type}_public_key_path"
+        ).read_text()
+        private_key = jwt_key_provider.get_private_key(token_type)
+        public_key = jwt_key_provider.get_public_key(token_type)
+        token = jwt.encode(payload, private_key, algorithm)
+
+        results = {
+            "encode, PEM": _tokens_per_sec(
+                lambda: jwt.encode(payload, private_pem, algorithm)
+            ),
+            "encode, preparsed": _tokens_per_sec(
+                lambda: jwt.encode(payload, private_key, algorithm)
+            ),
+            "decode, PEM": _tokens_per_sec(
+                lambda: jwt.decode(token, public_pem, [algorithm])
+            ),
+            "decode, preparsed": _tokens_per_sec(
+                lambda: jwt.decode(token, public_key, [algorithm])
+            ),
+        }
+        for name, rate in results.items():
+            print(f"{token_type:<8} {name:<18} {rate:>10.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares the CPU cost of the login path (mint an access and a refresh
+token, hash the refresh token for the DB) and the refresh path (check
+the refresh token, mint an access token) in the `jwt` and `opaque`
+refresh token modes. DB round trips are the same in both modes and are
+not included.
+
+Usage (from the project root, with generated certs):
+    python -m benchmarks.bench_refresh_tokens
+"""
+import os
+import time
+import uuid
+from typing import Callable
+
+os.environ.setdefault("MODE", "DEV")
+os.environ.setdefault("DB__URL", "postgresql+psycopg://u:p@localhost/db")
+
+from app.services.auth_service import (  # noqa: E402
+    create_access_token,
+    create_opaque_refresh_token,
+    create_refresh_token,
+    decode_refresh_token,
+)
+from app.services.refresh_token_service import _hash_token  # noqa: E402
+
+ITERATIONS = 300
+PAYLOAD = {"sub": "benchmark"}
+
+
+def _ops_per_sec(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return ITERATIONS / (time.perf_counter() - started)
+
+
+def _jwt_login() -> None:
+    create_access_token(PAYLOAD, 0, 2 ** 40)
+    _hash_token(create_refresh_token(PAYLOAD, 0, 2 ** 40))
+
+
+def _opaque_login() -> None:
+    create_access_token(PAYLOAD, 0, 2 ** 40)
+    _hash_token(create_opaque_refresh_token(uuid.uuid4(), 2 ** 40))
+
+
+def main() -> None:
+    jwt_refresh_token = create_refresh_token(PAYLOAD, 0, 2 ** 40)
+    opaque_refresh_token = create_opaque_refresh_token(uuid.uuid4(), 2 ** 40)
+
+    def jwt_refresh() -> None:
+        _hash_token(jwt_refresh_token)
+        decode_refresh_token(jwt_refresh_token)
+        create_access_token(PAYLOAD, 0, 2 ** 40)
+
+    def opaque_refresh() -> None:
+        _hash_token(opaque_refresh_token)
+        create_access_token(PAYLOAD, 0, 2 ** 40)
+
+    print(f"{'mode':<8} {'logins/s':>10} {'refreshes/s':>12}")
+    for mode, login, refresh in (
+        ("jwt", _jwt_login, jwt_refresh),
+        ("opaque", _opaque_login, opaque_refresh),
+    ):
+        print(
+            f"{mode:<8} {_ops_per_sec(login):>10.0f} "
+            f"{_ops_per_sec(refresh):>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
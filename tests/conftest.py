@@ -1,13 +1,54 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
 from typing import AsyncGenerator
 
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.testclient import TestClient
 
-from app.core.config import settings
-from app.db.dependencies import database_manager
-from app.main import main_app
-from app.models import Base
+
+
+def _generate_test_certs() -> Path:
+    """
+    The tests sign with throwaway keys instead of the ones in `certs`.
+    They are set through the environment before the settings are loaded,
+    so process workers pick them up as well.
+    """
+    certs_path = Path(tempfile.mkdtemp(prefix="test-certs-"))
+    os.environ["AUTH__CERTS_PATH"] = str(certs_path)
+    for token_type in ("access", "refresh"):
+        private_key = rsa.generate_private_key(65537, 2048)
+        private_path = certs_path / f"{token_type}_private.pem"
+        public_path = certs_path / f"{token_type}_public.pem"
+        private_path.write_bytes(
+            private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+        public_path.write_bytes(
+            private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+        env_prefix = f"AUTH__{token_type.upper()}"
+        os.environ[f"{env_prefix}_PRIVATE_KEY_PATH"] = str(private_path)
+        os.environ[f"{env_prefix}_PUBLIC_KEY_PATH"] = str(public_path)
+    return certs_path
+
+
+TEST_CERTS_PATH = _generate_test_certs()
+
+from app.core.config import settings  # noqa: E402
+from app.db.dependencies import database_manager  # noqa: E402
+from app.main import main_app  # noqa: E402
+from app.models import Base  # noqa: E402
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -33,3 +74,7 @@ def client():
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     async for session in database_manager.get_session():
         yield session
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_CERTS_PATH, ignore_errors=True)
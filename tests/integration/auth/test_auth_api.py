@@ -1,11 +1,18 @@
 import time
+import uuid
 from enum import Enum
 
+import jwt
 import pytest
+from anyio.from_thread import start_blocking_portal
+from sqlalchemy import event
 from starlette import status
 from starlette.testclient import TestClient
 
+from app.api.dependencies.auth_dependencies import login_admission
 from app.core.config import settings
+from app.db.dependencies import database_manager
+from app.services.user_service import update_user_claims
 
 
 class RegistrationExpectedResponse(Enum):
@@ -177,6 +184,52 @@ def test_login(
         assert client.cookies.get("refresh_token") is None
 
 
+@pytest.mark.parametrize(
+    "username, password, email",
+    [
+        (
+            "sophia",
+            "password",
+            "sophia@example.com",
+        ),
+    ]
+)
+def test_login__overloaded(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    email: str,
+):
+    signup_response = client.post(
+        url=f"{settings.api.prefix_v1}/registration/",
+        json={
+            "username": username,
+            "password": password,
+            "email": email,
+        }
+    )
+    assert signup_response.status_code == status.HTTP_201_CREATED
+
+    monkeypatch.setattr(login_admission, "max_in_flight", 0)
+    monkeypatch.setattr(login_admission, "max_queued", 0)
+    shed_before = login_admission.shed
+
+    login_response = client.post(
+        url=f"{settings.api.prefix_v1}/login/",
+        data={
+            "username": username,
+            "password": password,
+        }
+    )
+    assert login_response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert login_response.headers["Retry-After"] == str(
+        settings.login_admission.retry_after_sec
+    )
+    assert login_admission.shed == shed_before + 1
+    assert client.cookies.get("access_token") is None
+
+
 @pytest.mark.parametrize(
     "username, password, email, status_code, fail_type, json_answer",
     [
@@ -262,6 +315,59 @@ def test_refresh_access_token(
         assert refresh_response.json() == json_answer
 
 
+@pytest.mark.parametrize(
+    "username, password, email",
+    [
+        (
+            "cazorla",
+            "password",
+            "cazorla@example.com",
+        ),
+    ]
+)
+def test_refresh_access_token__opaque_mode(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    email: str,
+):
+    monkeypatch.setattr(settings.auth, "refresh_token_mode", "opaque")
+    signup_response = client.post(
+        url=f"{settings.api.prefix_v1}/registration/",
+        json={
+            "username": username,
+            "password": password,
+            "email": email,
+        }
+    )
+    assert signup_response.status_code == status.HTTP_201_CREATED
+
+    login_response = client.post(
+        url=f"{settings.api.prefix_v1}/login/",
+        data={
+            "username": username,
+            "password": password,
+        }
+    )
+    assert login_response.status_code == status.HTTP_200_OK
+    refresh_token = client.cookies.get("refresh_token")
+    assert refresh_token is not None
+    assert refresh_token.count(".") == 2
+    assert uuid.UUID(refresh_token.split(".")[0])
+
+    client.cookies.pop("access_token")
+    refresh_response = client.post(url=f"{settings.api.prefix_v1}/refresh/")
+    assert refresh_response.status_code == status.HTTP_200_OK
+    me_response = client.get(url=f"{settings.api.prefix_v1}/me/")
+    assert me_response.json()["username"] == username
+
+    client.post(url=f"{settings.api.prefix_v1}/logout/")
+    client.cookies.update({"refresh_token": refresh_token})
+    refresh_response = client.post(url=f"{settings.api.prefix_v1}/refresh/")
+    assert refresh_response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 @pytest.mark.parametrize(
     "username, password, email, status_code, json_answer",
     [
@@ -300,6 +406,9 @@ def test_logout(
         }
     )
     assert login_response.status_code == status.HTTP_200_OK
+    access_token = client.cookies.get("access_token")
+    me_response = client.get(url=f"{settings.api.prefix_v1}/me/")
+    assert me_response.status_code == status.HTTP_200_OK
 
     logout_response = client.post(
         url=f"{settings.api.prefix_v1}/logout/",
@@ -309,6 +418,11 @@ def test_logout(
     assert client.cookies.get("access_token") is None
     assert client.cookies.get("refresh_token") is None
 
+    client.cookies.update({"access_token": access_token})
+    me_response = client.get(url=f"{settings.api.prefix_v1}/me/")
+    assert me_response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert me_response.json() == {"detail": "Invalid token."}
+
 
 @pytest.mark.parametrize(
     "username, password, email, status_code, fail_type",
@@ -385,3 +499,88 @@ def test_auth_user_get_info(
         )
         assert get_info_response.status_code == status_code
         assert get_info_response.json() == expected_json_answer
+
+
+async def change_user(user_id: int) -> None:
+    async with database_manager.session_factory() as session:
+        await update_user_claims(user_id, {"active": True}, session)
+
+
+@pytest.mark.parametrize(
+    "username, email, embed_user_claims, claims_version_bump, "
+    "user_changed, db_reads",
+    [
+        ("pires", "pires@example.com", True, 0, False, 0),
+        ("lauren", "lauren@example.com", True, 1, False, 1),
+        ("campbell", "campbell@example.com", False, 0, False, 1),
+        ("cole", "cole@example.com", True, 0, True, 1),
+    ]
+)
+def test_auth_user_get_info__user_claims(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    email: str,
+    embed_user_claims: bool,
+    claims_version_bump: int,
+    user_changed: bool,
+    db_reads: int,
+):
+    monkeypatch.setattr(settings.auth, "embed_user_claims", embed_user_claims)
+    signup_response = client.post(
+        url=f"{settings.api.prefix_v1}/registration/",
+        json={
+            "username": username,
+            "password": "password",
+            "email": email,
+        }
+    )
+    assert signup_response.status_code == status.HTTP_201_CREATED
+    login_response = client.post(
+        url=f"{settings.api.prefix_v1}/login/",
+        data={
+            "username": username,
+            "password": "password",
+        }
+    )
+    assert login_response.status_code == status.HTTP_200_OK
+    if user_changed:
+        claims = jwt.decode(
+            client.cookies["access_token"],
+            options={"verify_signature": False},
+        )
+        # like the requests, on a loop of its own
+        with start_blocking_portal() as portal:
+            portal.call(change_user, claims["uid"])
+    monkeypatch.setattr(
+        settings.auth,
+        "user_claims_version",
+        settings.auth.user_claims_version + claims_version_bump,
+    )
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = database_manager.engine.sync_engine
+    for refresh in (False, True):
+        if refresh:
+            client.cookies.pop("access_token")
+            refresh_response = client.post(
+                url=f"{settings.api.prefix_v1}/refresh/"
+            )
+            assert refresh_response.status_code == status.HTTP_200_OK
+            statements.clear()
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            me_response = client.get(url=f"{settings.api.prefix_v1}/me/")
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        assert me_response.status_code == status.HTTP_200_OK
+        assert me_response.json() == {"username": username, "email": email}
+        # a refreshed token carries the current claims version
+        if refresh and embed_user_claims:
+            assert len(statements) == 0
+        else:
+            assert len(statements) == db_reads
@@ -0,0 +1,59 @@
+import pytest
+from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies.auth_dependencies import validate_credentials
+from app.core.config import settings
+from app.repositories import user_repo
+from app.schemas.user_schemas import SUserSignUp
+from app.services.auth_service import hash_password, password_needs_rehash
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, password, email, stored_rounds, active_rounds",
+    [
+        (
+            "ljungberg",
+            "password",
+            "ljungberg@example.com",
+            4,
+            5,
+        ),
+        (
+            "vieira",
+            "password",
+            "vieira@example.com",
+            5,
+            5,
+        ),
+    ]
+)
+async def test_validate_credentials__rehash_on_login(
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    username: str,
+    password: str,
+    email: EmailStr,
+    stored_rounds: int,
+    active_rounds: int,
+):
+    monkeypatch.setattr(settings.hashing, "bcrypt_rounds", stored_rounds)
+    user = SUserSignUp(
+        username=username,
+        password=hash_password(password),
+        email=email,
+    )
+    user_from_db = await user_repo.add(db_session, user.model_dump())
+    old_password_hash = user_from_db.password
+
+    monkeypatch.setattr(settings.hashing, "bcrypt_rounds", active_rounds)
+    validated_user = await validate_credentials(username, password, db_session)
+    assert validated_user.id == user_from_db.id
+
+    await db_session.refresh(validated_user)
+    assert not password_needs_rehash(validated_user.password)
+    if stored_rounds == active_rounds:
+        assert validated_user.password == old_password_hash
+    else:
+        assert validated_user.password != old_password_hash
@@ -0,0 +1,29 @@
+import jwt
+from jwt.algorithms import RSAAlgorithm
+from starlette import status
+from starlette.testclient import TestClient
+
+from app.services.auth_service import create_access_token
+
+
+def test_get_jwks(
+    client: TestClient,
+):
+    response = client.get(url="/.well-known/jwks.json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    etag = response.headers["ETag"]
+
+    jwks = response.json()
+    token = create_access_token({"sub": "lampard"}, iat=1, expire=2 ** 40)
+    kid = jwt.get_unverified_header(token)["kid"]
+    jwk = next(key for key in jwks["keys"] if key["kid"] == kid)
+    public_key = RSAAlgorithm.from_jwk(jwk)
+    assert jwt.decode(token, public_key, [jwk["alg"]])["sub"] == "lampard"
+
+    not_modified_response = client.get(
+        url="/.well-known/jwks.json",
+        headers={"If-None-Match": etag},
+    )
+    assert not_modified_response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified_response.headers["ETag"] == etag
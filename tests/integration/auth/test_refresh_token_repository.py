@@ -63,7 +63,7 @@ async def test_add_refresh_token(
     added_token = tokens[-1]
 
     assert added_token.user_id == user_id
-    assert added_token.token_hash == token_hash
+    assert added_token.token_hash == token_hash.encode()
     assert added_token.created_at == created_at
     assert added_token.expires_at == expires_at
     device_info_from_db_scheme = SDeviceInfo.model_validate(
@@ -115,7 +115,7 @@ async def test_get_refresh_token(
     token_after_get = await refresh_token_repo.get(db_session, token_from_db.id)
     assert token_after_get.id == token_from_db.id
     assert token_after_get.user_id == user_id
-    assert token_after_get.token_hash == token_hash
+    assert token_after_get.token_hash == token_hash.encode()
     device_info_from_db_scheme = SDeviceInfo.model_validate(
         token_after_get.device_info
     )
@@ -210,14 +210,14 @@ async def test_get_refresh_token_by_filter(
     await refresh_token_repo.add(db_session, refresh_token.model_dump())
     token_from_db = await refresh_token_repo.get_by_filter(
         db_session,
-        {"token_hash": token_hash},
+        {"token_hash": token_hash.encode()},
     )
-    assert token_from_db.token_hash == token_hash
+    assert token_from_db.token_hash == token_hash.encode()
     assert token_from_db.user_id == user_id
 
     none_from_db = await refresh_token_repo.get_by_filter(
         db_session,
-        {"token_hash": typo_token_hash},
+        {"token_hash": typo_token_hash.encode()},
     )
     assert none_from_db is None
 
@@ -259,13 +259,13 @@ async def test_delete_refresh_token(
 
     tokens_before = await refresh_token_repo.get_all(db_session, {})
     tokens_before = [token.token_hash for token in tokens_before]
-    assert token_hash in tokens_before
+    assert token_hash.encode() in tokens_before
 
     await refresh_token_repo.delete(db_session, token_from_db.id)
 
     tokens_after = await refresh_token_repo.get_all(db_session, {})
     tokens_after = [token.token_hash for token in tokens_after]
-    assert token_hash not in tokens_after
+    assert token_hash.encode() not in tokens_after
 
     assert len(tokens_before) - 1 == len(tokens_after)
 
@@ -1,8 +1,14 @@
+import uuid
+from datetime import datetime, UTC
+
+import orjson
 import pytest
 from pydantic import EmailStr
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.db.dependencies import database_manager, invalidation_bus
 from app.repositories import user_repo, refresh_token_repo
 from app.schemas.device_info_schema import SDeviceInfo
 from app.schemas.refresh_token_schema import SRefreshToken
@@ -12,10 +18,14 @@ from app.services.refresh_token_service import (
     _hash_token,
     check_token_in_db,
     delete_refresh_token_from_db,
-    _delete_all_user_auth_sessions,
+    _delete_oldest_user_auth_sessions,
     _delete_same_device_auth_sessions,
     add_refresh_token_to_db,
+    get_refresh_token_payload_from_db,
+    refresh_token_cache,
+    REFRESH_TOKENS_TOPIC,
 )
+from app.services.auth_service import create_opaque_refresh_token
 
 
 @pytest.mark.asyncio
@@ -161,7 +171,7 @@ async def test_delete_refresh_token_from_db(
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
-    "username, password, email, token_prefix, add_n_times",
+    "username, password, email, token_prefix, add_n_times, keep",
     [
         (
             "neuer",
@@ -169,6 +179,7 @@ async def test_delete_refresh_token_from_db(
             "neuer@example.com",
             "neuer_token",
             7,
+            0,
         ),
         (
             "robben",
@@ -176,16 +187,34 @@ async def test_delete_refresh_token_from_db(
             "robben@example.com",
             "robben_token",
             0,
+            0,
+        ),
+        (
+            "muller",
+            "password",
+            "muller@example.com",
+            "muller_token",
+            5,
+            2,
+        ),
+        (
+            "lahm",
+            "password",
+            "lahm@example.com",
+            "lahm_token",
+            2,
+            4,
         ),
     ]
 )
-async def test__delete_all_user_auth_sessions(
+async def test__delete_oldest_user_auth_sessions(
     db_session: AsyncSession,
     username: str,
     password: str,
     email: EmailStr,
     token_prefix: str,
     add_n_times: int,
+    keep: int,
 ):
     user = SUserSignUp(
         username=username,
@@ -199,7 +228,7 @@ async def test__delete_all_user_auth_sessions(
         refresh_token = SRefreshToken(
             user_id=user_id,
             token_hash=token_hash,
-            created_at=1234567890,
+            created_at=1234567890 + i,
             expires_at=1234567890 + 3600,
             device_info=SDeviceInfo(user_agent="Mozilla", ip_address=f"1.{i}"),
         )
@@ -208,10 +237,13 @@ async def test__delete_all_user_auth_sessions(
     user_sessions = await _get_all_user_auth_sessions(db_session, user_id)
     assert len(user_sessions) == add_n_times
 
-    await _delete_all_user_auth_sessions(db_session, user_sessions)
+    await _delete_oldest_user_auth_sessions(db_session, user_id, keep)
 
     user_sessions = await _get_all_user_auth_sessions(db_session, user_id)
-    assert len(user_sessions) == 0
+    kept_qty = min(add_n_times, keep)
+    assert sorted(s.created_at for s in user_sessions) == [
+        1234567890 + i for i in range(add_n_times - kept_qty, add_n_times)
+    ]
 
 
 @pytest.mark.asyncio
@@ -367,13 +399,13 @@ async def test_add_refresh_token_to_db__too_much_active_auth_sessions(
     user_sessions = await _get_all_user_auth_sessions(db_session, user_id)
     assert len(user_sessions) == 0
 
-    for _ in range(settings.auth.max_active_auth_sessions):
+    for i in range(settings.auth.max_active_auth_sessions):
         refresh_token = SRefreshToken(
             user_id=user_id,
             token_hash=token,
-            created_at=1234567890,
+            created_at=1234567890 + i,
             expires_at=1234567890 + 3600,
-            device_info=SDeviceInfo(user_agent="Opera", ip_address="2.2.2")
+            device_info=SDeviceInfo(user_agent="Opera", ip_address=f"2.2.{i}")
         )
         await refresh_token_repo.add(db_session, refresh_token.model_dump())
 
@@ -388,15 +420,17 @@ async def test_add_refresh_token_to_db__too_much_active_auth_sessions(
         session=db_session,
         token=token,
         user_id=user_id,
-        created_at=1234567890,
+        created_at=1234567890 + 3600,
         expires_at=1234567890 + 3600,
         device_info=last_token_device_info,
     )
 
     user_sessions = await _get_all_user_auth_sessions(db_session, user_id)
-    assert len(user_sessions) == 1
+    assert len(user_sessions) == settings.auth.max_active_auth_sessions
 
-    assert user_sessions[0].device_info == last_token_device_info.model_dump()
+    devices = [s.device_info for s in user_sessions]
+    assert last_token_device_info.model_dump() in devices
+    assert {"user_agent": "Opera", "ip_address": "2.2.0"} not in devices
 
 
 @pytest.mark.asyncio
@@ -502,3 +536,320 @@ async def test_add_refresh_token_to_db__same_device_info(
 
     user_sessions = await _get_all_user_auth_sessions(db_session, user_id)
     assert len(user_sessions) == diff_dev_info + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email, expires_in, is_valid",
+    [
+        (
+            "mertesacker",
+            "mertesacker@example.com",
+            3600,
+            True,
+        ),
+        (
+            "koscielny",
+            "koscielny@example.com",
+            -1,
+            False,
+        ),
+    ]
+)
+async def test_get_refresh_token_payload_from_db(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+    expires_in: int,
+    is_valid: bool,
+):
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    token = f"{username}_opaque_token"
+    now = int(datetime.now(UTC).timestamp())
+
+    assert await get_refresh_token_payload_from_db(db_session, token) is None
+
+    refresh_token = SRefreshToken(
+        user_id=user_id,
+        token_hash=_hash_token(token),
+        created_at=now,
+        expires_at=now + expires_in,
+        device_info=SDeviceInfo(user_agent="Mozilla", ip_address="1.1.1"),
+    )
+    await refresh_token_repo.add(db_session, refresh_token.model_dump())
+
+    payload = await get_refresh_token_payload_from_db(db_session, token)
+    if not is_valid:
+        assert payload is None
+        return
+    assert payload == {
+        "sub": username,
+        "iat": now,
+        "exp": now + expires_in,
+        "token_type": "refresh",
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email",
+    [
+        (
+            "flamini",
+            "flamini@example.com",
+        ),
+    ]
+)
+async def test_check_token_in_db__session_id(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+):
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    session_id = uuid.uuid4()
+    token = create_opaque_refresh_token(session_id, 1234567890 + 3600)
+    forged_token = create_opaque_refresh_token(session_id, 1234567890 + 3600)
+
+    await add_refresh_token_to_db(
+        db_session,
+        token,
+        user_id,
+        1234567890,
+        1234567890 + 3600,
+        SDeviceInfo(user_agent="Mozilla", ip_address="1.1.1"),
+        session_id,
+    )
+    token_in_db = await refresh_token_repo.get(db_session, session_id)
+    assert token_in_db is not None
+    assert token_in_db.token_hash == _hash_token(token)
+
+    assert await check_token_in_db(db_session, token) is True
+    assert await check_token_in_db(db_session, forged_token) is False
+
+    await delete_refresh_token_from_db(db_session, forged_token)
+    assert await check_token_in_db(db_session, token) is True
+    await delete_refresh_token_from_db(db_session, token)
+    assert await check_token_in_db(db_session, token) is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email, existing_sessions",
+    [
+        ("wilshere", "wilshere@example.com", 1),
+        ("ramsey", "ramsey@example.com", 4),
+        ("walcott", "walcott@example.com", 9),
+    ]
+)
+async def test_add_refresh_token_to_db__constant_statements(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+    existing_sessions: int,
+):
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    for i in range(existing_sessions):
+        refresh_token = SRefreshToken(
+            user_id=user_id,
+            token_hash=f"{username}_token_{i}",
+            created_at=1234567890,
+            expires_at=1234567890 + 3600,
+            device_info=SDeviceInfo(user_agent="Opera", ip_address=f"1.{i}"),
+        )
+        await refresh_token_repo.add(db_session, refresh_token.model_dump())
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = database_manager.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        await add_refresh_token_to_db(
+            session=db_session,
+            token=f"{username}_token",
+            user_id=user_id,
+            created_at=1234567890,
+            expires_at=1234567890 + 3600,
+            device_info=SDeviceInfo(user_agent="Opera", ip_address="1.0"),
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert len(statements) == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email, revoke",
+    [
+        ("schweinsteiger", "schweinsteiger@example.com", "logout"),
+        ("ozil", "ozil@example.com", "same_device_login"),
+        ("kroos", "kroos@example.com", "other_worker"),
+    ]
+)
+async def test_check_token_in_db__cache(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+    revoke: str,
+):
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    now = int(datetime.now(UTC).timestamp())
+    device_info = SDeviceInfo(user_agent="Safari", ip_address="2.2.2")
+    token = f"{username}_token"
+    await add_refresh_token_to_db(
+        db_session, token, user_id, now, now + 3600, device_info
+    )
+    assert await check_token_in_db(db_session, token) is True
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = database_manager.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        assert await check_token_in_db(db_session, token) is True
+        payload = await get_refresh_token_payload_from_db(db_session, token)
+        assert await get_refresh_token_payload_from_db(
+            db_session, token
+        ) == payload
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    assert len(statements) == 1
+    assert payload["sub"] == username
+
+    if revoke == "logout":
+        await delete_refresh_token_from_db(db_session, token)
+    elif revoke == "other_worker":
+        await refresh_token_repo.delete_by_filter(
+            db_session, {"token_hash": _hash_token(token)}
+        )
+        assert await check_token_in_db(db_session, token) is True
+        invalidation_bus.dispatch(
+            orjson.dumps(
+                {"t": REFRESH_TOKENS_TOPIC, "k": [_hash_token(token).hex()]}
+            ).decode()
+        )
+    else:
+        await add_refresh_token_to_db(
+            db_session, f"{token}_new", user_id, now, now + 3600, device_info
+        )
+    assert refresh_token_cache.get(_hash_token(token)) is None
+    assert await check_token_in_db(db_session, token) is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email",
+    [
+        ("gotze", "gotze@example.com"),
+    ]
+)
+async def test_check_token_in_db__cache_staleness(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(
+        settings.auth, "refresh_token_cache_max_staleness_sec", 0
+    )
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    now = int(datetime.now(UTC).timestamp())
+    token = f"{username}_token"
+    await add_refresh_token_to_db(
+        db_session,
+        token,
+        user_id,
+        now,
+        now + 3600,
+        SDeviceInfo(user_agent="Safari", ip_address="3.3.3"),
+    )
+    assert await check_token_in_db(db_session, token) is True
+    assert refresh_token_cache.get(_hash_token(token)) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email, lookup",
+    [
+        ("ballack", "ballack@example.com", "check"),
+        ("matthaus", "matthaus@example.com", "payload"),
+    ]
+)
+async def test_check_token_in_db__revoked_during_lookup(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+    lookup: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    now = int(datetime.now(UTC).timestamp())
+    token = f"{username}_token"
+    await add_refresh_token_to_db(
+        db_session,
+        token,
+        user_id,
+        now,
+        now + 3600,
+        SDeviceInfo(user_agent="Safari", ip_address="4.4.4"),
+    )
+
+    def revoke_after(read_row):
+        # a logout on this worker commits while the row is being read
+        async def read_row_and_revoke(*args, **kwargs):
+            row = await read_row(*args, **kwargs)
+            async with database_manager.session_factory() as session:
+                await delete_refresh_token_from_db(session, token)
+            return row
+        return read_row_and_revoke
+
+    for method in ("get_by_filter", "get_with_username"):
+        monkeypatch.setattr(
+            refresh_token_repo,
+            method,
+            revoke_after(getattr(refresh_token_repo, method)),
+        )
+    if lookup == "check":
+        await check_token_in_db(db_session, token)
+    else:
+        await get_refresh_token_payload_from_db(db_session, token)
+    monkeypatch.undo()
+
+    assert refresh_token_cache.get(_hash_token(token)) is None
+    assert await check_token_in_db(db_session, token) is False
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import TokenSweeper
+from app.db.dependencies import database_manager
+from app.db.locks import try_advisory_xact_lock
+from app.repositories import user_repo, refresh_token_repo
+from app.schemas.device_info_schema import SDeviceInfo
+from app.schemas.refresh_token_schema import SRefreshToken
+from app.schemas.user_schemas import SUserSignUp
+from app.services.refresh_token_service import _get_all_user_auth_sessions
+from app.services import token_sweeper_service
+from app.services.token_sweeper_service import (
+    purge_expired_refresh_tokens,
+    run_refresh_token_sweeper,
+    sweeper_stats,
+)
+
+NOW = 1_000
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email, expired_qty, active_qty, batch_size",
+    [
+        ("giroud", "giroud@example.com", 5, 2, 2),
+        ("podolski", "podolski@example.com", 0, 3, 2),
+        ("sagna", "sagna@example.com", 4, 0, 10),
+    ]
+)
+async def test_purge_expired_refresh_tokens(
+    db_session: AsyncSession,
+    username: str,
+    email: EmailStr,
+    expired_qty: int,
+    active_qty: int,
+    batch_size: int,
+):
+    user = SUserSignUp(
+        username=username,
+        password=b"password",
+        email=email,
+    )
+    user_id = (await user_repo.add(db_session, user.model_dump())).id
+    for i in range(expired_qty + active_qty):
+        refresh_token = SRefreshToken(
+            user_id=user_id,
+            token_hash=f"{username}_token_{i}",
+            created_at=0,
+            expires_at=NOW - 1 if i < expired_qty else NOW + 3600,
+            device_info=SDeviceInfo(user_agent="Opera", ip_address=f"1.{i}"),
+        )
+        await refresh_token_repo.add(db_session, refresh_token.model_dump())
+
+    config = TokenSweeper(batch_size=batch_size, batch_pause_sec=0)
+    purged = await purge_expired_refresh_tokens(db_session, config, now=NOW)
+
+    assert purged == expired_qty
+    user_sessions = await _get_all_user_auth_sessions(db_session, user_id)
+    assert len(user_sessions) == active_qty
+    assert all(s.expires_at > NOW for s in user_sessions)
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_refresh_tokens__locked(
+    db_session: AsyncSession,
+):
+    config = TokenSweeper(batch_pause_sec=0)
+    async with database_manager.session_factory() as leader_session:
+        assert await try_advisory_xact_lock(
+            leader_session, config.advisory_lock_key
+        )
+        assert await purge_expired_refresh_tokens(
+            db_session, config, now=NOW
+        ) is None
+        await leader_session.rollback()
+
+    assert await purge_expired_refresh_tokens(
+        db_session, config, now=NOW
+    ) == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_run_refresh_token_sweeper__maintenance_failure(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def broken_maintenance(*args) -> None:
+        raise RuntimeError("partition constraint would be violated")
+
+    monkeypatch.setattr(
+        token_sweeper_service, "_maintain_partitions", broken_maintenance
+    )
+    runs_before = sweeper_stats["runs"]
+    failures_before = sweeper_stats["partition_failures"]
+    sweeper = asyncio.create_task(
+        run_refresh_token_sweeper(
+            TokenSweeper(interval_sec=0.01, batch_pause_sec=0)
+        )
+    )
+    try:
+        async with asyncio.timeout(5):
+            while sweeper_stats["runs"] < runs_before + 2:
+                await asyncio.sleep(0.01)
+    finally:
+        sweeper.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sweeper
+    assert sweeper_stats["partition_failures"] >= failures_before + 2
@@ -1,6 +1,8 @@
 from contextlib import nullcontext
 from typing import ContextManager
 
+import time
+
 import pytest
 from pydantic import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,11 +11,13 @@ from app.exceptions.user_exceptions import UsernameAlreadyExists, EmailAlreadyEx
 from app.models import UserModel
 from app.repositories import user_repo
 from app.schemas.user_schemas import SUserSignUp
+from app.services.auth_service import user_claims_versions
 from app.services.user_service import (
     _check_unique_username,
     _check_unique_email,
     get_user_by_username,
     create_user,
+    update_user_claims,
 )
 
 
@@ -155,3 +159,57 @@ async def test_add_user(
         assert isinstance(user_from_db, UserModel)
         assert user_from_db.username == username
         assert user_from_db.email == email
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, password, email, values",
+    [
+        (
+            "vidic",
+            "password",
+            "vidic@example.com",
+            {"active": False},
+        ),
+        (
+            "ferdinand",
+            "password",
+            "ferdinand@example.com",
+            {"email": "rio.ferdinand@example.com", "active": False},
+        ),
+    ]
+)
+async def test_update_user_claims(
+    db_session: AsyncSession,
+    username: str,
+    password: str,
+    email: EmailStr,
+    values: dict,
+):
+    user = SUserSignUp(
+        username=username,
+        password=password.encode(),
+        email=email,
+    )
+    user_from_db = await create_user(user, db_session)
+    assert user_from_db.claims_version == 1
+    issued_at = int(time.time())
+
+    assert await update_user_claims(user_from_db.id, values, db_session) == 2
+    assert await update_user_claims(user_from_db.id, {}, db_session) == 3
+
+    await db_session.refresh(user_from_db)
+    assert user_from_db.claims_version == 3
+    for field, value in values.items():
+        assert getattr(user_from_db, field) == value
+    assert user_claims_versions.is_current(
+        user_from_db.id, 2, issued_at
+    ) is False
+    assert user_claims_versions.is_current(
+        user_from_db.id, 3, issued_at
+    ) is True
+
+
+@pytest.mark.asyncio
+async def test_update_user_claims__no_user(db_session: AsyncSession):
+    assert await update_user_claims(10**9, {"active": False}, db_session) is None
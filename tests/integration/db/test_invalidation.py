@@ -0,0 +1,162 @@
+import asyncio
+from typing import AsyncGenerator, Callable
+
+import orjson
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dependencies import database_manager
+from app.db.invalidation import (
+    MAX_PAYLOAD_BYTES,
+    InvalidationBus,
+    _encode_messages,
+)
+
+TOPIC = "items"
+
+
+class Collector:
+    def __init__(self):
+        self.keys: list[str] = []
+        self.flushes = 0
+
+    def on_keys(self, keys: list[str]) -> None:
+        self.keys.extend(keys)
+
+    def on_flush(self) -> None:
+        self.flushes += 1
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def collector() -> Collector:
+    return Collector()
+
+
+@pytest.fixture
+async def bus(collector: Collector) -> AsyncGenerator[InvalidationBus, None]:
+    bus = InvalidationBus(
+        database_manager.engine,
+        channel="test_invalidation",
+        reconnect_delay=0.05,
+    )
+    bus.subscribe(TOPIC, collector.on_keys, collector.on_flush)
+    task = asyncio.create_task(bus.run())
+    await asyncio.wait_for(bus.listening.wait(), 5)
+    yield bus
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(
+    "commit, expected_keys",
+    [
+        (True, ["a1", "b2"]),
+        (False, []),
+    ]
+)
+async def test_invalidation_bus__publish(
+    db_session: AsyncSession,
+    bus: InvalidationBus,
+    collector: Collector,
+    commit: bool,
+    expected_keys: list[str],
+):
+    await bus.publish(db_session, TOPIC, ["a1", "b2"])
+    await bus.publish(db_session, "other_topic", ["c3"])
+    await asyncio.sleep(0.05)
+    assert collector.keys == []
+
+    if commit:
+        await db_session.commit()
+        await wait_until(lambda: bus.stats["received"] == 2)
+    else:
+        await db_session.rollback()
+        await asyncio.sleep(0.1)
+    assert collector.keys == expected_keys
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalidation_bus__reconnect(
+    db_session: AsyncSession,
+    bus: InvalidationBus,
+    collector: Collector,
+):
+    backend_pid = bus.backend_pid
+    assert collector.flushes == 1
+
+    await db_session.execute(select(func.pg_terminate_backend(backend_pid)))
+    await db_session.commit()
+    await wait_until(
+        lambda: bus.backend_pid not in (None, backend_pid)
+    )
+    assert collector.flushes == 2
+    assert bus.stats["reconnects"] == 1
+
+    await bus.publish(db_session, TOPIC, ["d4"])
+    await db_session.commit()
+    await wait_until(lambda: collector.keys == ["d4"])
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalidation_bus__malformed_message(
+    bus: InvalidationBus,
+    collector: Collector,
+):
+    bus.dispatch("not json")
+    bus.dispatch(orjson.dumps({"k": ["e5"]}).decode())
+    assert collector.flushes == 3
+    assert collector.keys == []
+
+
+@pytest.mark.parametrize("keys_count", [0, 1, 200, 1000])
+def test__encode_messages(keys_count: int):
+    keys = [f"{i:064x}" for i in range(keys_count)]
+    messages = _encode_messages(TOPIC, keys)
+
+    decoded_keys = []
+    for message in messages:
+        assert len(message.encode()) < MAX_PAYLOAD_BYTES
+        decoded = orjson.loads(message)
+        assert decoded["t"] == TOPIC
+        decoded_keys.extend(decoded["k"])
+    assert decoded_keys == keys
+    assert len(messages) == -(-keys_count * 67 // MAX_PAYLOAD_BYTES)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalidation_bus__probe(
+    db_session: AsyncSession,
+    collector: Collector,
+):
+    bus = InvalidationBus(
+        database_manager.engine,
+        channel="test_invalidation_probe",
+        reconnect_delay=0.05,
+        probe_interval=0.05,
+    )
+    bus.subscribe(TOPIC, collector.on_keys, collector.on_flush)
+    task = asyncio.create_task(bus.run())
+    try:
+        await wait_until(lambda: bus.stats["probes"] >= 2)
+        await bus.publish(db_session, TOPIC, ["f6"])
+        await db_session.commit()
+        await wait_until(lambda: collector.keys == ["f6"])
+        assert bus.stats["reconnects"] == 0
+
+        # a probe that does not answer in time counts as a lost connection
+        bus.probe_timeout = 0
+        await wait_until(lambda: collector.flushes >= 2)
+        assert bus.stats["reconnects"] >= 1
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
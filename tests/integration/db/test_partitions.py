@@ -0,0 +1,167 @@
+from typing import AsyncGenerator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.partitions import (
+    RangePartition,
+    create_range_partitions,
+    drop_range_partitions_before,
+    get_default_partition,
+    get_partition_key,
+    get_range_partitions,
+    is_partitioned,
+    partition_name,
+)
+from app.db.dependencies import database_manager
+from app.services.token_sweeper_service import (
+    maintain_refresh_token_partitions,
+)
+
+TABLE = "partitioned_items"
+
+
+@pytest.fixture
+async def partitioned_table(
+    db_session: AsyncSession,
+) -> AsyncGenerator[str, None]:
+    await db_session.execute(
+        text(
+            f"CREATE TABLE {TABLE} (id INTEGER, expires_at INTEGER) "
+            f"PARTITION BY RANGE (expires_at)"
+        )
+    )
+    await db_session.execute(
+        text(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+    )
+    await db_session.commit()
+    yield TABLE
+    await db_session.rollback()
+    await db_session.execute(text(f"DROP TABLE {TABLE}"))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "start, end, interval, expected_starts, drop_before, left_starts",
+    [
+        (105, 300, 100, [100, 200], 250, [200]),
+        (0, 250, 50, [0, 50, 100, 150, 200], 100, [100, 150, 200]),
+        (10, 11, 100, [0], 0, [0]),
+    ]
+)
+async def test_range_partitions(
+    db_session: AsyncSession,
+    partitioned_table: str,
+    start: int,
+    end: int,
+    interval: int,
+    expected_starts: list[int],
+    drop_before: int,
+    left_starts: list[int],
+):
+    assert await is_partitioned(db_session, partitioned_table)
+    assert not await is_partitioned(db_session, "users")
+
+    created = await create_range_partitions(
+        db_session, partitioned_table, start, end, interval
+    )
+    assert created == [
+        partition_name(partitioned_table, s) for s in expected_starts
+    ]
+    assert await create_range_partitions(
+        db_session, partitioned_table, start, end, interval
+    ) == []
+    assert await get_range_partitions(db_session, partitioned_table) == [
+        RangePartition(partition_name(partitioned_table, s), s, s + interval)
+        for s in expected_starts
+    ]
+
+    await db_session.execute(
+        text(f"INSERT INTO {partitioned_table} VALUES (1, :value)"),
+        {"value": expected_starts[0]},
+    )
+    await drop_range_partitions_before(
+        db_session, partitioned_table, drop_before
+    )
+    partitions = await get_range_partitions(db_session, partitioned_table)
+    assert [p.start for p in partitions] == left_starts
+
+
+@pytest.mark.asyncio
+async def test_maintain_refresh_token_partitions__not_partitioned(
+    db_session: AsyncSession,
+):
+    assert await maintain_refresh_token_partitions(db_session) == ([], [])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "values, expected_starts",
+    [
+        ([120, 150, 450], [100, 400]),
+        ([], []),
+    ]
+)
+async def test_create_range_partitions__rows_in_default(
+    db_session: AsyncSession,
+    partitioned_table: str,
+    values: list[int],
+    expected_starts: list[int],
+):
+    for i, value in enumerate(values):
+        await db_session.execute(
+            text(f"INSERT INTO {partitioned_table} VALUES (:id, :value)"),
+            {"id": i, "value": value},
+        )
+    default_partition = await get_default_partition(
+        db_session, partitioned_table
+    )
+    assert default_partition == f"{partitioned_table}_default"
+    assert await get_partition_key(db_session, partitioned_table) == (
+        "expires_at"
+    )
+
+    created = await create_range_partitions(
+        db_session, partitioned_table, 0, 500, 100
+    )
+    assert len(created) == 5
+
+    rows_in_default = await db_session.scalar(
+        text(f"SELECT count(*) FROM {default_partition}")
+    )
+    assert rows_in_default == 0
+    for start in expected_starts:
+        rows = await db_session.scalar(
+            text(f'SELECT count(*) FROM "{partition_name(TABLE, start)}"')
+        )
+        assert rows == len([v for v in values if start <= v < start + 100])
+    assert await db_session.scalar(
+        text(f"SELECT count(*) FROM {partitioned_table}")
+    ) == len(values)
+
+
+@pytest.mark.asyncio
+async def test_drop_range_partitions_before__busy(
+    db_session: AsyncSession,
+    partitioned_table: str,
+):
+    await create_range_partitions(db_session, partitioned_table, 0, 300, 100)
+    await db_session.commit()
+
+    # a long transaction that reads the table blocks the detach
+    async with database_manager.session_factory() as reader:
+        await reader.execute(text(f"SELECT * FROM {partitioned_table}"))
+        assert await drop_range_partitions_before(
+            db_session, partitioned_table, 200, lock_timeout_ms=10
+        ) == []
+        await db_session.commit()
+        await reader.rollback()
+
+    assert await drop_range_partitions_before(
+        db_session, partitioned_table, 200, lock_timeout_ms=10
+    ) == [partition_name(partitioned_table, s) for s in (0, 100)]
+    await db_session.commit()
+    partitions = await get_range_partitions(db_session, partitioned_table)
+    assert [p.start for p in partitions] == [200]
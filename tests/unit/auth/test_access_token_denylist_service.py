@@ -0,0 +1,59 @@
+import time
+import uuid
+
+import orjson
+import pytest
+
+from app.db.dependencies import invalidation_bus
+from app.services.access_token_denylist_service import (
+    ACCESS_TOKEN_DENYLIST_TOPIC,
+    is_access_token_revoked,
+)
+
+
+@pytest.mark.parametrize(
+    "payload, is_revocable",
+    [
+        ({"jti": uuid.uuid4().hex, "exp": int(time.time()) + 300}, True),
+        ({"jti": "custom-jti", "exp": int(time.time()) + 300}, True),
+        ({"jti": uuid.uuid4().hex, "exp": int(time.time()) - 1}, False),
+        ({"exp": int(time.time()) + 300}, False),
+        ({"jti": uuid.uuid4().hex}, False),
+    ]
+)
+def test_is_access_token_revoked(
+    payload: dict,
+    is_revocable: bool,
+):
+    assert is_access_token_revoked(payload) is False
+
+    # a revocation announced by another worker
+    invalidation_bus.dispatch(
+        orjson.dumps(
+            {
+                "t": ACCESS_TOKEN_DENYLIST_TOPIC,
+                "k": [f"{payload.get('exp', 0)}:{payload.get('jti', '')}"],
+            }
+        ).decode()
+    )
+    assert is_access_token_revoked(payload) is is_revocable
+    assert is_access_token_revoked(
+        {**payload, "jti": uuid.uuid4().hex}
+    ) is False
+
+
+@pytest.mark.parametrize(
+    "malformed_key",
+    ["no-separator", "soon:custom-jti", ":custom-jti", 42, None],
+)
+def test_is_access_token_revoked__malformed_key(malformed_key):
+    payload = {"jti": uuid.uuid4().hex, "exp": int(time.time()) + 300}
+    invalidation_bus.dispatch(
+        orjson.dumps(
+            {
+                "t": ACCESS_TOKEN_DENYLIST_TOPIC,
+                "k": [malformed_key, f"{payload['exp']}:{payload['jti']}"],
+            }
+        ).decode()
+    )
+    assert is_access_token_revoked(payload) is True
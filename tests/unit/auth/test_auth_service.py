@@ -1,10 +1,15 @@
+import asyncio
+import uuid
 from contextlib import nullcontext
 from datetime import datetime, UTC
 from typing import ContextManager
 
 import pytest
+from jwt import InvalidTokenError
 
-from app.core.config import settings
+from app.core.config import settings, AuthScheduler, CryptoExecutor
+from app.core.scheduler import WorkClass
+from app.services import auth_service
 from app.services.auth_service import (
     TokenType,
     get_token_iat_and_exp,
@@ -15,6 +20,26 @@ from app.services.auth_service import (
     decode_refresh_token,
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
+    password_hashing_pool,
+    password_needs_rehash,
+    access_claims_cache,
+    invalidate_access_token,
+    build_crypto_executor,
+    build_auth_scheduler,
+    create_access_token_async,
+    create_refresh_token_async,
+    decode_access_token_async,
+    decode_refresh_token_async,
+    create_opaque_refresh_token,
+    issue_access_token,
+    get_refresh_token_key,
+    RefreshTokenKey,
+)
+from app.services.password_hashers import (
+    calibrate_bcrypt_rounds,
+    BCRYPT_MIN_ROUNDS,
 )
 
 
@@ -108,3 +133,246 @@ def test_hash_password(
     hashed_password = hash_password(password)
     assert hashed_password is not None
     assert verify_password(password, hashed_password)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "password, wrong_password",
+    [
+        ("qwerty", "qwerty1"),
+    ]
+)
+async def test_hash_password_async(
+    password: str,
+    wrong_password: str,
+):
+    completed_before = password_hashing_pool.stats.completed
+    hashed_password = await hash_password_async(password)
+    assert await verify_password_async(password, hashed_password)
+    assert not await verify_password_async(wrong_password, hashed_password)
+
+    stats = password_hashing_pool.stats.snapshot()
+    assert stats["completed"] == completed_before + 3
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.parametrize(
+    "hash_rounds, active_rounds, needs_rehash",
+    [
+        (4, 4, False),
+        (4, 5, True),
+        (6, 5, False),
+        (7, 5, True),
+    ]
+)
+def test_password_needs_rehash(
+    monkeypatch: pytest.MonkeyPatch,
+    hash_rounds: int,
+    active_rounds: int,
+    needs_rehash: bool,
+):
+    monkeypatch.setattr(settings.hashing, "bcrypt_rounds", hash_rounds)
+    hashed_password = hash_password("qwerty")
+
+    monkeypatch.setattr(settings.hashing, "bcrypt_rounds", active_rounds)
+    assert password_needs_rehash(hashed_password) is needs_rehash
+    assert password_needs_rehash(b"not a bcrypt hash") is True
+
+
+@pytest.mark.parametrize(
+    "target_ms, min_rounds, max_rounds, expected_rounds",
+    [
+        (0, BCRYPT_MIN_ROUNDS, 31, BCRYPT_MIN_ROUNDS),
+        (0, BCRYPT_MIN_ROUNDS + 1, 31, BCRYPT_MIN_ROUNDS + 1),
+        (
+            10 ** 6,
+            BCRYPT_MIN_ROUNDS,
+            BCRYPT_MIN_ROUNDS + 2,
+            BCRYPT_MIN_ROUNDS + 2,
+        ),
+    ]
+)
+def test_calibrate_bcrypt_rounds(
+    target_ms: int,
+    min_rounds: int,
+    max_rounds: int,
+    expected_rounds: int,
+):
+    rounds = calibrate_bcrypt_rounds(
+        target_ms,
+        min_rounds=min_rounds,
+        max_rounds=max_rounds,
+        samples=2,
+    )
+    assert rounds == expected_rounds
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"sub": "kante"},
+    ]
+)
+def test_decode_access_token__claims_cache(
+    payload: dict,
+):
+    iat = int(datetime.now(UTC).timestamp())
+    token = create_access_token(payload, iat, iat + 300)
+
+    misses_before = access_claims_cache.misses
+    hits_before = access_claims_cache.hits
+    first_payload = decode_access_token(token)
+    second_payload = decode_access_token(token)
+    assert first_payload == second_payload
+    assert access_claims_cache.misses == misses_before + 1
+    assert access_claims_cache.hits == hits_before + 1
+
+    second_payload["sub"] = "changed"
+    assert decode_access_token(token)["sub"] == payload["sub"]
+
+    invalidate_access_token(token)
+    decode_access_token(token)
+    assert access_claims_cache.misses == misses_before + 2
+
+
+@pytest.mark.parametrize(
+    "mode",
+    [
+        "inline",
+        "thread",
+        "process",
+    ]
+)
+async def test_crypto_executor(
+    monkeypatch: pytest.MonkeyPatch,
+    mode: str,
+):
+    executor = build_crypto_executor(
+        CryptoExecutor(mode=mode, max_workers=2)  # type: ignore
+    )
+    monkeypatch.setattr(auth_service, "crypto_executor", executor)
+    payload = {"sub": f"drogba-{mode}"}
+    iat = int(datetime.now(UTC).timestamp())
+    try:
+        access_token, refresh_token = await asyncio.gather(
+            create_access_token_async(payload, iat, iat + 300),
+            create_refresh_token_async(payload, iat, iat + 300),
+        )
+        assert (await decode_access_token_async(access_token))["sub"] == (
+            payload["sub"]
+        )
+        assert (await decode_refresh_token_async(refresh_token))["sub"] == (
+            payload["sub"]
+        )
+        with pytest.raises(InvalidTokenError):
+            await decode_refresh_token_async(access_token)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if executor is None:
+        return
+    stats = executor.stats.snapshot()
+    assert stats["completed"] == 4
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert 0 < stats["utilisation"] <= 1
+
+
+SESSION_ID = uuid.UUID("5f0c6c1e-7f0b-4b8e-9a56-0e7e5b1d3c11")
+
+
+@pytest.mark.parametrize(
+    "token, expected_key",
+    [
+        (
+            create_refresh_token(
+                {"sub": "terry", "jti": str(SESSION_ID)}, 1, 2 ** 40
+            ),
+            RefreshTokenKey(SESSION_ID, 2 ** 40),
+        ),
+        (create_refresh_token({"sub": "terry"}, 1, 2 ** 40), None),
+        (
+            create_opaque_refresh_token(SESSION_ID, 2 ** 40),
+            RefreshTokenKey(SESSION_ID, 2 ** 40),
+        ),
+        (f"{SESSION_ID}.secret", RefreshTokenKey(SESSION_ID, None)),
+        ("not-a-uuid.secret", None),
+        ("a.%%%.c", None),
+        ("legacy_token", None),
+    ]
+)
+def test_get_refresh_token_key(
+    token: str,
+    expected_key: RefreshTokenKey | None,
+):
+    assert get_refresh_token_key(token) == expected_key
+
+
+@pytest.mark.asyncio
+async def test_issue_access_token():
+    payload = {"sub": "essien"}
+    iat = int(datetime.now(UTC).timestamp())
+    first_token, second_token = await asyncio.gather(
+        issue_access_token(payload, iat, iat + 300),
+        issue_access_token(payload, iat, iat + 300),
+    )
+    first_payload = await decode_access_token_async(first_token)
+    second_payload = await decode_access_token_async(second_token)
+    assert first_payload["sub"] == second_payload["sub"] == payload["sub"]
+    assert first_payload["jti"] != second_payload["jti"]
+    assert uuid.UUID(hex=first_payload["jti"])
+    assert payload == {"sub": "essien"}
+
+
+@pytest.mark.asyncio
+async def test_decode_access_token_async__inline_skips_scheduler(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    scheduler = build_auth_scheduler(
+        AuthScheduler(
+            max_concurrency=2,
+            token_verify_quota=2,
+            token_mint_quota=1,
+            password_hash_quota=1,
+        )
+    )
+    monkeypatch.setattr(auth_service, "auth_scheduler", scheduler)
+    monkeypatch.setattr(auth_service, "crypto_executor", None)
+    for _ in range(2):
+        await scheduler.acquire(WorkClass.TOKEN_VERIFY)
+
+    iat = int(datetime.now(UTC).timestamp())
+    token = create_access_token({"sub": "makelele"}, iat, iat + 300)
+    payload = await asyncio.wait_for(decode_access_token_async(token), 1)
+    assert payload["sub"] == "makelele"
+    assert scheduler.snapshot()["token_verify"]["waiting"] == 0
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+async def test_decode_jwt_async__parsed_once(
+    monkeypatch: pytest.MonkeyPatch,
+    mode: str,
+):
+    executor = build_crypto_executor(
+        CryptoExecutor(mode=mode, max_workers=1)  # type: ignore
+    )
+    monkeypatch.setattr(auth_service, "crypto_executor", executor)
+    prechecked = []
+
+    def precheck_jwt(token, token_type):
+        prechecked.append(token)
+        return real_precheck_jwt(token, token_type)
+
+    real_precheck_jwt = auth_service.precheck_jwt
+    monkeypatch.setattr(auth_service, "precheck_jwt", precheck_jwt)
+    iat = int(datetime.now(UTC).timestamp())
+    refresh_token = create_refresh_token({"sub": "lampard"}, iat, iat + 300)
+    try:
+        payload = await decode_refresh_token_async(refresh_token)
+    finally:
+        if executor:
+            executor.shutdown()
+    assert payload["sub"] == "lampard"
+    assert prechecked == [refresh_token]
@@ -0,0 +1,47 @@
+import pytest
+
+from app.schemas.device_info_schema import SDeviceInfo, FINGERPRINT_SIZE
+from app.schemas.refresh_token_schema import SRefreshToken
+
+
+@pytest.mark.parametrize(
+    "first, second, same_fingerprint",
+    [
+        (
+            SDeviceInfo(user_agent="Mozilla/5.0", ip_address="1.1.1.1"),
+            SDeviceInfo(user_agent=" Mozilla/5.0 ", ip_address="1.1.1.1"),
+            True,
+        ),
+        (
+            SDeviceInfo(user_agent=None, ip_address="1.1.1.1"),
+            SDeviceInfo(user_agent="", ip_address="1.1.1.1"),
+            True,
+        ),
+        (
+            SDeviceInfo(user_agent="Mozilla/5.0", ip_address="1.1.1.1"),
+            SDeviceInfo(user_agent="Mozilla/5.0", ip_address="1.1.1.2"),
+            False,
+        ),
+        (
+            SDeviceInfo(user_agent="1.1.1.1", ip_address=None),
+            SDeviceInfo(user_agent=None, ip_address="1.1.1.1"),
+            False,
+        ),
+    ]
+)
+def test_device_info_fingerprint(
+    first: SDeviceInfo,
+    second: SDeviceInfo,
+    same_fingerprint: bool,
+):
+    assert len(first.fingerprint()) == FINGERPRINT_SIZE
+    assert (first.fingerprint() == second.fingerprint()) is same_fingerprint
+
+    token = SRefreshToken(
+        user_id=1,
+        token_hash=b"hash",
+        created_at=1,
+        expires_at=2,
+        device_info=first,
+    )
+    assert token.model_dump()["device_fingerprint"] == first.fingerprint()
@@ -0,0 +1,100 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from app.services.jwt_codec import (
+    encode_jwt,
+    get_header_segment,
+    verify_jwt_signature,
+)
+
+KEY_FACTORIES = {
+    "RS256": lambda: rsa.generate_private_key(65537, 2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+@pytest.mark.parametrize(
+    "algorithm, kid, claims, is_deterministic",
+    [
+        (
+            "RS256",
+            "rsa-kid",
+            {"sub": "torres", "iat": 1, "exp": 2, "token_type": "access"},
+            True,
+        ),
+        (
+            "EdDSA",
+            None,
+            {"sub": "торрес", "iat": 1, "exp": 2, "token_type": "refresh"},
+            True,
+        ),
+        (
+            "ES256",
+            "ec-kid",
+            {"sub": "torres", "iat": 1, "exp": 2, "token_type": "access"},
+            False,
+        ),
+    ]
+)
+def test_encode_jwt__compatible_with_pyjwt(
+    algorithm: str,
+    kid: str | None,
+    claims: dict,
+    is_deterministic: bool,
+):
+    private_key = KEY_FACTORIES[algorithm]()
+    headers = {"kid": kid} if kid else None
+
+    token = encode_jwt(claims, private_key, algorithm, kid)
+    pyjwt_token = jwt.encode(claims, private_key, algorithm, headers)
+
+    if is_deterministic:
+        assert token == pyjwt_token
+    else:
+        assert token.rsplit(".", 1)[0] == pyjwt_token.rsplit(".", 1)[0]
+    assert jwt.get_unverified_header(token) == jwt.get_unverified_header(
+        pyjwt_token
+    )
+    assert jwt.decode(
+        token,
+        private_key.public_key(),
+        [algorithm],
+        options={"verify_exp": False},
+    ) == claims
+    verify_jwt_signature(pyjwt_token, private_key.public_key(), algorithm)
+    assert get_header_segment(algorithm, kid) is get_header_segment(
+        algorithm, kid
+    )
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [
+        "RS256",
+        "ES256",
+        "EdDSA",
+    ]
+)
+def test_verify_jwt_signature__invalid(
+    algorithm: str,
+):
+    private_key = KEY_FACTORIES[algorithm]()
+    other_key = KEY_FACTORIES[algorithm]()
+    claims = {"sub": "gerrard", "iat": 1, "exp": 2, "token_type": "access"}
+    token = encode_jwt(claims, private_key, algorithm)
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        verify_jwt_signature(token, other_key.public_key(), algorithm)
+
+    header, payload, signature = token.split(".")
+    forged_payload = encode_jwt(
+        {**claims, "sub": "admin"}, other_key, algorithm
+    ).split(".")[1]
+    with pytest.raises(jwt.InvalidSignatureError):
+        verify_jwt_signature(
+            f"{header}.{forged_payload}.{signature}",
+            private_key.public_key(),
+            algorithm,
+        )
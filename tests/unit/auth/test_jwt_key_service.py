@@ -0,0 +1,308 @@
+import asyncio
+import os
+from contextlib import nullcontext
+from pathlib import Path
+from typing import ContextManager
+
+import jwt
+import orjson
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.asymmetric.rsa import (
+    RSAPrivateKey,
+    RSAPublicKey,
+)
+
+from app.core.config import settings, JWTAuth
+from app.exceptions.key_exceptions import KeyTypeMismatch, UnsupportedAlgorithm
+from app.services.auth_service import (
+    TokenType,
+    create_access_token,
+    create_refresh_token,
+    decode_access_token,
+    decode_refresh_token,
+)
+from app.services import auth_service
+from app.services.jwt_key_service import JWTKeyProvider, jwt_key_provider
+
+
+KEY_FACTORIES = {
+    "rsa": lambda: rsa.generate_private_key(65537, 2048),
+    "p256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "p384": lambda: ec.generate_private_key(ec.SECP384R1()),
+    "ed25519": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def _write_key_pair(certs_path: Path, token_type: str, key_kind: str):
+    private_key = KEY_FACTORIES[key_kind]()
+    private_path = certs_path / f"{token_type}_private.pem"
+    public_path = certs_path / f"{token_type}_public.pem"
+    private_path.write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    public_path.write_bytes(
+        private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    return private_path, public_path
+
+
+def _make_jwt_config(
+    certs_path: Path,
+    access_key_kind: str,
+    access_algorithm: str,
+    refresh_key_kind: str,
+    refresh_algorithm: str,
+) -> JWTAuth:
+    access_private, access_public = _write_key_pair(
+        certs_path, "access", access_key_kind
+    )
+    refresh_private, refresh_public = _write_key_pair(
+        certs_path, "refresh", refresh_key_kind
+    )
+    return JWTAuth(
+        certs_path=certs_path,
+        access_private_key_path=access_private,
+        access_public_key_path=access_public,
+        refresh_private_key_path=refresh_private,
+        refresh_public_key_path=refresh_public,
+        access_algorithm=access_algorithm,
+        refresh_algorithm=refresh_algorithm,
+    )
+
+
+@pytest.mark.parametrize(
+    "access_key_kind, access_algorithm, refresh_key_kind, "
+    "refresh_algorithm, expectation",
+    [
+        ("ed25519", "EdDSA", "p256", "ES256", nullcontext()),
+        ("p256", "ES256", "rsa", "RS256", nullcontext()),
+        ("rsa", "PS256", "ed25519", "EdDSA", nullcontext()),
+        ("rsa", "EdDSA", "rsa", "RS256", pytest.raises(KeyTypeMismatch)),
+        ("p384", "ES256", "rsa", "RS256", pytest.raises(KeyTypeMismatch)),
+        ("rsa", "RS256", "p256", "RS256", pytest.raises(KeyTypeMismatch)),
+        ("rsa", "HS256", "rsa", "RS256", pytest.raises(UnsupportedAlgorithm)),
+    ]
+)
+def test_jwt_key_provider__algorithms(
+    tmp_path: Path,
+    access_key_kind: str,
+    access_algorithm: str,
+    refresh_key_kind: str,
+    refresh_algorithm: str,
+    expectation: ContextManager,
+):
+    config = _make_jwt_config(
+        tmp_path,
+        access_key_kind,
+        access_algorithm,
+        refresh_key_kind,
+        refresh_algorithm,
+    )
+    provider = JWTKeyProvider(config)
+    with expectation:
+        provider.load()
+        for token_type in ("access", "refresh"):
+            algorithm = provider.get_algorithm(token_type)
+            token = jwt.encode(
+                {"sub": "pirlo"},
+                provider.get_private_key(token_type),
+                algorithm,
+            )
+            assert jwt.decode(
+                token,
+                provider.get_public_key(token_type),
+                [algorithm],
+            ) == {"sub": "pirlo"}
+
+
+@pytest.mark.parametrize(
+    "token_type",
+    [
+        TokenType.ACCESS,
+        TokenType.REFRESH,
+    ]
+)
+def test_jwt_key_provider__load(
+    token_type: TokenType,
+):
+    provider = JWTKeyProvider(settings.auth)
+    provider.load()
+
+    assert isinstance(provider.get_private_key(token_type), RSAPrivateKey)
+    assert isinstance(provider.get_public_key(token_type), RSAPublicKey)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"sub": "zidane"},
+    ]
+)
+def test_preparsed_keys_are_compatible_with_pem(
+    payload: dict,
+):
+    access_token = create_access_token(
+        payload,
+        iat=1,
+        expire=2 ** 40,
+        private_key=settings.auth.access_private_key_path.read_text(),
+    )
+    refresh_token = create_refresh_token(payload, iat=1, expire=2 ** 40)
+
+    assert decode_access_token(access_token) == decode_access_token(
+        create_access_token(payload, iat=1, expire=2 ** 40)
+    )
+    assert decode_refresh_token(
+        refresh_token,
+        public_key=settings.auth.refresh_public_key_path.read_text(),
+    )["sub"] == payload["sub"]
+    assert jwt_key_provider.get_public_key(TokenType.ACCESS) is (
+        jwt_key_provider.get_public_key(TokenType.ACCESS)
+    )
+
+
+@pytest.mark.parametrize(
+    "old_key_kind, new_key_kind, new_algorithm",
+    [
+        ("rsa", "rsa", "RS256"),
+        ("rsa", "ed25519", "EdDSA"),
+    ]
+)
+def test_jwt_key_provider__rotation(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    old_key_kind: str,
+    new_key_kind: str,
+    new_algorithm: str,
+):
+    config = _make_jwt_config(tmp_path, old_key_kind, "RS256", "rsa", "RS256")
+    provider = JWTKeyProvider(config)
+    provider.load()
+    provider.add_reload_listener(auth_service.access_claims_cache.clear)
+    monkeypatch.setattr(auth_service, "jwt_key_provider", provider)
+
+    old_kid = provider.get_signing_key("access").kid
+    old_token = create_access_token({"sub": "kaka"}, iat=1, expire=2 ** 40)
+    assert jwt.get_unverified_header(old_token)["kid"] == old_kid
+
+    (tmp_path / "access_public.pem").rename(
+        tmp_path / "access_public.retiring.pem"
+    )
+    _write_key_pair(tmp_path, "access", new_key_kind)
+    config.access_algorithm = new_algorithm
+    provider.reload()
+
+    new_kid = provider.get_signing_key("access").kid
+    new_token = create_access_token({"sub": "kaka"}, iat=1, expire=2 ** 40)
+    assert new_kid != old_kid
+    assert jwt.get_unverified_header(new_token)["kid"] == new_kid
+    assert decode_access_token(old_token)["sub"] == "kaka"
+    assert decode_access_token(new_token)["sub"] == "kaka"
+
+    jwks = orjson.loads(provider.get_jwks()[0])
+    assert {key["kid"] for key in jwks["keys"]} == {old_kid, new_kid}
+
+    (tmp_path / "access_public.retiring.pem").unlink()
+    provider.reload()
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_access_token(old_token)
+    assert decode_access_token(new_token)["sub"] == "kaka"
+
+
+def test_jwt_key_provider__lazy_loading(
+    tmp_path: Path,
+):
+    missing_certs_path = tmp_path / "missing"
+    config = JWTAuth(
+        certs_path=missing_certs_path,
+        access_private_key_path=missing_certs_path / "access_private.pem",
+        access_public_key_path=missing_certs_path / "access_public.pem",
+        refresh_private_key_path=missing_certs_path / "refresh_private.pem",
+        refresh_public_key_path=missing_certs_path / "refresh_public.pem",
+    )
+    provider = JWTKeyProvider(config)
+
+    with pytest.raises(FileNotFoundError):
+        provider.get_signing_key("access")
+
+    missing_certs_path.mkdir()
+    _write_key_pair(missing_certs_path, "access", "rsa")
+    _write_key_pair(missing_certs_path, "refresh", "rsa")
+    assert isinstance(provider.get_private_key("access"), RSAPrivateKey)
+
+
+@pytest.mark.asyncio
+async def test_jwt_key_provider__watch(
+    tmp_path: Path,
+):
+    config = _make_jwt_config(tmp_path, "rsa", "RS256", "rsa", "RS256")
+    provider = JWTKeyProvider(config)
+    reloads = []
+    provider.add_reload_listener(lambda: reloads.append(1))
+    old_kid = provider.get_signing_key("refresh").kid
+    assert provider.reload_if_changed() is False
+
+    watcher = asyncio.create_task(provider.watch(interval=0.01))
+    try:
+        _write_key_pair(tmp_path, "refresh", "rsa")
+        stat = config.refresh_public_key_path.stat()
+        os.utime(
+            config.refresh_public_key_path,
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9),
+        )
+        for _ in range(100):
+            if reloads:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        watcher.cancel()
+
+    assert reloads
+    assert provider.get_signing_key("refresh").kid != old_kid
+    assert provider.reload_if_changed() is False
+
+
+@pytest.mark.parametrize("token_type", ["access", "refresh"])
+def test_jwt_key_provider__mismatched_pair(
+    tmp_path: Path,
+    token_type: str,
+):
+    config = _make_jwt_config(tmp_path, "rsa", "RS256", "rsa", "RS256")
+    provider = JWTKeyProvider(config)
+    old_kid = provider.get_signing_key(token_type).kid
+
+    # the private key of the next pair is in place, the public one is not
+    next_pair_path = tmp_path / "next"
+    next_pair_path.mkdir()
+    next_private, next_public = _write_key_pair(
+        next_pair_path, token_type, "rsa"
+    )
+    private_path = getattr(config, f"{token_type}_private_key_path")
+    public_path = getattr(config, f"{token_type}_public_key_path")
+    next_private.replace(private_path)
+    with pytest.raises(KeyTypeMismatch):
+        provider.reload_if_changed()
+    assert provider.get_signing_key(token_type).kid == old_kid
+
+    next_public.replace(public_path)
+    assert provider.reload_if_changed() is True
+    token = jwt.encode(
+        {"sub": "seedorf"},
+        provider.get_private_key(token_type),
+        "RS256",
+        headers={"kid": provider.get_signing_key(token_type).kid},
+    )
+    key = provider.get_verification_key(
+        token_type, jwt.get_unverified_header(token)["kid"]
+    )
+    assert key is not None and key.kid != old_kid
+    assert jwt.decode(token, key.public_key, ["RS256"]) == {"sub": "seedorf"}
@@ -0,0 +1,118 @@
+import base64
+import time
+
+import jwt
+import orjson
+import pytest
+
+from app.services.auth_service import (
+    TokenType,
+    create_access_token,
+    create_refresh_token,
+    decode_access_token,
+    decode_refresh_token,
+)
+from app.services.jwt_precheck import (
+    precheck_jwt,
+    rejections,
+    RejectionReason,
+)
+
+
+def _segment(data: dict | list) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(data)).rstrip(b"=").decode()
+
+
+def _unsigned_token(header: dict, payload: dict | list) -> str:
+    return f"{_segment(header)}.{_segment(payload)}.c2lnbmF0dXJl"
+
+
+NOW = int(time.time())
+VALID_HEADER = {"alg": "RS256", "typ": "JWT"}
+VALID_PAYLOAD = {
+    "sub": "drogba",
+    "iat": NOW,
+    "exp": NOW + 300,
+    "token_type": "access",
+}
+
+
+@pytest.mark.parametrize(
+    "token, reason",
+    [
+        ("abcde", RejectionReason.MALFORMED),
+        ("a.b", RejectionReason.MALFORMED),
+        ("a..c", RejectionReason.MALFORMED),
+        ("!!!.???.sig", RejectionReason.MALFORMED),
+        (
+            _unsigned_token(VALID_HEADER, [1, 2]),
+            RejectionReason.MALFORMED,
+        ),
+        (
+            _unsigned_token(VALID_HEADER, {**VALID_PAYLOAD, "exp": "soon"}),
+            RejectionReason.MALFORMED,
+        ),
+        (
+            _unsigned_token({"alg": "none"}, VALID_PAYLOAD),
+            RejectionReason.ALGORITHM,
+        ),
+        (
+            _unsigned_token({"alg": "HS256"}, VALID_PAYLOAD),
+            RejectionReason.ALGORITHM,
+        ),
+        (
+            _unsigned_token(VALID_HEADER, {**VALID_PAYLOAD, "exp": NOW - 1}),
+            RejectionReason.EXPIRED,
+        ),
+        (
+            _unsigned_token(VALID_HEADER, {**VALID_PAYLOAD, "iat": NOW + 60}),
+            RejectionReason.IMMATURE,
+        ),
+        (
+            _unsigned_token(
+                VALID_HEADER, {**VALID_PAYLOAD, "token_type": "refresh"}
+            ),
+            RejectionReason.TOKEN_TYPE,
+        ),
+    ]
+)
+def test_precheck_jwt__rejections(
+    token: str,
+    reason: RejectionReason,
+):
+    rejections_before = rejections[reason]
+    with pytest.raises(jwt.InvalidTokenError):
+        precheck_jwt(token, TokenType.ACCESS)
+    assert rejections[reason] == rejections_before + 1
+
+
+def test_precheck_jwt__valid_token():
+    header, payload = precheck_jwt(
+        _unsigned_token(VALID_HEADER, VALID_PAYLOAD),
+        TokenType.ACCESS,
+    )
+    assert header == VALID_HEADER
+    assert payload == VALID_PAYLOAD
+
+
+def test_decode__token_type_mismatch():
+    iat = int(time.time())
+    access_token = create_access_token({"sub": "essien"}, iat, iat + 300)
+    refresh_token = create_refresh_token({"sub": "essien"}, iat, iat + 300)
+    forged_refresh_token = create_refresh_token(
+        {"sub": "essien"},
+        iat,
+        iat + 300,
+        token_type=TokenType.ACCESS,
+    )
+
+    rejections_before = rejections[RejectionReason.TOKEN_TYPE]
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_refresh_token(access_token)
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_access_token(refresh_token)
+    assert rejections[RejectionReason.TOKEN_TYPE] == rejections_before + 2
+
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_access_token(forged_refresh_token)
+    assert rejections[RejectionReason.UNKNOWN_KEY] >= 1
@@ -0,0 +1,126 @@
+import pytest
+
+from app.core.config import PasswordHashing
+from app.services.password_hashers import (
+    build_password_hasher_registry,
+    PasswordHasherRegistry,
+)
+
+
+@pytest.fixture
+def hashing_config() -> PasswordHashing:
+    return PasswordHashing(
+        bcrypt_rounds=4,
+        scrypt_n=2 ** 10,
+        pbkdf2_iterations=1000,
+    )
+
+
+@pytest.fixture
+def registry(hashing_config: PasswordHashing) -> PasswordHasherRegistry:
+    return build_password_hasher_registry(hashing_config)
+
+
+@pytest.mark.parametrize(
+    "algorithm, prefix",
+    [
+        ("bcrypt", "$2b$04$"),
+        ("scrypt", "$scrypt$ln=10,r=8,p=1$"),
+        ("pbkdf2_sha256", "$pbkdf2-sha256$i=1000$"),
+    ]
+)
+def test_hash_and_verify(
+    hashing_config: PasswordHashing,
+    registry: PasswordHasherRegistry,
+    algorithm: str,
+    prefix: str,
+):
+    hashing_config.default_algorithm = algorithm  # type: ignore
+    hashed_password = registry.hash("qwerty")
+
+    assert hashed_password.startswith(prefix.encode())
+    assert registry.identify(hashed_password) is registry.get(algorithm)
+    assert registry.verify("qwerty", hashed_password)
+    assert not registry.verify("qwerty1", hashed_password)
+    assert not registry.needs_rehash(hashed_password)
+
+
+@pytest.mark.parametrize(
+    "algorithm, param, new_value",
+    [
+        ("bcrypt", "bcrypt_rounds", 5),
+        ("scrypt", "scrypt_n", 2 ** 11),
+        ("scrypt", "scrypt_r", 4),
+        ("pbkdf2_sha256", "pbkdf2_iterations", 2000),
+    ]
+)
+def test_needs_rehash__params_changed(
+    hashing_config: PasswordHashing,
+    registry: PasswordHasherRegistry,
+    algorithm: str,
+    param: str,
+    new_value: int,
+):
+    hashing_config.default_algorithm = algorithm  # type: ignore
+    hashed_password = registry.hash("qwerty")
+
+    setattr(hashing_config, param, new_value)
+    assert registry.needs_rehash(hashed_password)
+    assert registry.verify("qwerty", hashed_password)
+
+
+@pytest.mark.parametrize(
+    "old_algorithm, new_algorithm",
+    [
+        ("bcrypt", "scrypt"),
+        ("scrypt", "pbkdf2_sha256"),
+        ("pbkdf2_sha256", "bcrypt"),
+    ]
+)
+def test_needs_rehash__algorithm_changed(
+    hashing_config: PasswordHashing,
+    registry: PasswordHasherRegistry,
+    old_algorithm: str,
+    new_algorithm: str,
+):
+    hashing_config.default_algorithm = old_algorithm  # type: ignore
+    hashed_password = registry.hash("qwerty")
+
+    hashing_config.default_algorithm = new_algorithm  # type: ignore
+    assert registry.needs_rehash(hashed_password)
+    assert registry.verify("qwerty", hashed_password)
+
+
+@pytest.mark.parametrize(
+    "hashed_password",
+    [
+        "",
+        "qwerty",
+        "$unknown$qwerty",
+        "$scrypt$ln=10$broken",
+        "$pbkdf2-sha256$i=1000$!!!$!!!",
+    ]
+)
+def test_verify__malformed_hash(
+    registry: PasswordHasherRegistry,
+    hashed_password: str,
+):
+    assert not registry.verify("qwerty", hashed_password.encode())
+    assert registry.needs_rehash(hashed_password.encode())
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [
+        "bcrypt",
+        "scrypt",
+        "pbkdf2_sha256",
+    ]
+)
+def test_benchmark_and_cost_profile(
+    registry: PasswordHasherRegistry,
+    algorithm: str,
+):
+    hasher = registry.get(algorithm)
+    assert hasher.benchmark(iterations=1) > 0
+    assert hasher.cost_profile()["memory_bytes"] >= 0
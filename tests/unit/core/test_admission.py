@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController
+from app.exceptions.admission_exceptions import AdmissionRejected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "max_in_flight, max_queued, requests_qty, shed_qty",
+    [
+        (2, 2, 4, 0),
+        (2, 1, 4, 1),
+        (1, 0, 3, 2),
+    ]
+)
+async def test_admission_controller__queue_limit(
+    max_in_flight: int,
+    max_queued: int,
+    requests_qty: int,
+    shed_qty: int,
+):
+    controller = AdmissionController(
+        max_in_flight=max_in_flight,
+        max_queued=max_queued,
+        max_queue_wait=5,
+    )
+    release = asyncio.Event()
+
+    async def request() -> bool:
+        try:
+            async with controller.admit():
+                await release.wait()
+        except AdmissionRejected:
+            return False
+        return True
+
+    tasks = [asyncio.create_task(request()) for _ in range(requests_qty)]
+    await asyncio.sleep(0.01)
+    assert controller.in_flight == max_in_flight
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results.count(False) == shed_qty
+    stats = controller.snapshot()
+    assert stats["admitted"] == requests_qty - shed_qty
+    assert stats["shed"] == shed_qty
+    assert stats["queued"] == min(requests_qty - max_in_flight, max_queued)
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_controller__queue_wait_timeout():
+    controller = AdmissionController(
+        max_in_flight=1,
+        max_queued=10,
+        max_queue_wait=0.05,
+    )
+    await controller.acquire()
+
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire()
+
+    controller.release()
+    await controller.acquire()
+    assert controller.snapshot() == {
+        "in_flight": 1,
+        "waiting": 0,
+        "admitted": 2,
+        "queued": 1,
+        "shed": 1,
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("handed_over", [True, False])
+async def test_admission_controller__cancelled_waiter(handed_over: bool):
+    controller = AdmissionController(
+        max_in_flight=1,
+        max_queued=10,
+        max_queue_wait=5,
+    )
+    await controller.acquire()
+    waiting = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0.01)
+    assert controller.snapshot()["waiting"] == 1
+
+    if handed_over:
+        controller.release()
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    stats = controller.snapshot()
+    assert stats["waiting"] == 0
+    assert stats["in_flight"] == int(not handed_over)
+    if not handed_over:
+        controller.release()
+    await asyncio.wait_for(controller.acquire(), 1)
+    assert controller.in_flight == 1
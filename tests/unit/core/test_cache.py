@@ -0,0 +1,104 @@
+import pytest
+
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "ttl, elapsed, is_cached",
+    [
+        (10, 0, True),
+        (10, 9, True),
+        (10, 10, False),
+        (10, 50, False),
+    ]
+)
+def test_ttl_cache__expiration(
+    ttl: int,
+    elapsed: int,
+    is_cached: bool,
+):
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, clock=clock)
+    cache.set("key", 1, expires_at=clock.now + ttl)
+
+    clock.now += elapsed
+    assert (cache.get("key") == 1) is is_cached
+    assert cache.hits == int(is_cached)
+    assert cache.misses == int(not is_cached)
+
+
+@pytest.mark.parametrize(
+    "maxsize, keys_qty",
+    [
+        (3, 2),
+        (3, 3),
+        (3, 7),
+    ]
+)
+def test_ttl_cache__lru_eviction(
+    maxsize: int,
+    keys_qty: int,
+):
+    clock = FakeClock()
+    cache: TTLCache[int, int] = TTLCache(maxsize=maxsize, clock=clock)
+    for i in range(keys_qty):
+        cache.set(i, i, expires_at=clock.now + 10)
+        cache.get(0)
+
+    assert len(cache) == min(maxsize, keys_qty)
+    assert cache.evictions == max(0, keys_qty - maxsize)
+    assert cache.get(0) == 0
+    assert cache.get(keys_qty - 1) == keys_qty - 1
+
+
+def test_ttl_cache__invalidate():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, clock=clock)
+    cache.set("key", 1, expires_at=clock.now + 10)
+    cache.set("other_key", 2, expires_at=clock.now + 10)
+    cache.set("expired_key", 3, expires_at=clock.now)
+
+    cache.invalidate("key")
+    assert cache.get("key") is None
+    assert cache.get("expired_key") is None
+    assert cache.get("other_key") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize(
+    "invalidate, is_cached",
+    [
+        (None, True),
+        ("key", False),
+        ("other_key", False),
+        ("clear", False),
+    ]
+)
+def test_ttl_cache__generation(
+    invalidate: str | None,
+    is_cached: bool,
+):
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, clock=clock)
+    generation = cache.generation
+
+    # the value is being looked up while another task invalidates
+    if invalidate == "clear":
+        cache.clear()
+    elif invalidate is not None:
+        cache.invalidate(invalidate)
+    cache.set("key", 1, expires_at=clock.now + 10, generation=generation)
+    assert (cache.get("key") == 1) is is_cached
+
+    cache.set("key", 1, expires_at=clock.now + 10, generation=cache.generation)
+    assert cache.get("key") == 1
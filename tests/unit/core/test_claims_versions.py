@@ -0,0 +1,73 @@
+import pytest
+
+from app.core.claims_versions import ClaimsVersions
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "versions, token_version, elapsed, is_current",
+    [
+        ([], 1, 0, True),
+        ([2], 1, 0, False),
+        ([2], 2, 0, True),
+        ([2], 3, 0, True),
+        ([3, 2], 2, 0, False),
+        ([2], 1, 299, False),
+        ([2], 1, 300, True),
+    ]
+)
+def test_claims_versions__is_current(
+    versions: list[int],
+    token_version: int,
+    elapsed: int,
+    is_current: bool,
+):
+    clock = FakeClock()
+    claims_versions = ClaimsVersions(ttl=300, clock=clock)
+    for version in versions:
+        claims_versions.set("user", version)
+
+    clock.now += elapsed
+    assert claims_versions.is_current(
+        "user", token_version, clock.now
+    ) is is_current
+    assert claims_versions.is_current("other_user", 1, clock.now) is True
+
+
+@pytest.mark.parametrize(
+    "issued_before_reset, is_current",
+    [
+        (10, False),
+        (0.5, True),
+        (0, True),
+    ]
+)
+def test_claims_versions__reset(
+    issued_before_reset: float,
+    is_current: bool,
+):
+    clock = FakeClock(1000.5)
+    claims_versions = ClaimsVersions(ttl=300, clock=clock)
+    claims_versions.set("user", 2)
+
+    claims_versions.reset()
+    assert len(claims_versions) == 0
+    assert claims_versions.is_current(
+        "user", 1, int(clock.now - issued_before_reset)
+    ) is is_current
+
+
+def test_claims_versions__purge():
+    clock = FakeClock()
+    claims_versions = ClaimsVersions(ttl=300, clock=clock)
+    claims_versions.set("user", 2)
+    clock.now += 300
+    claims_versions.set("other_user", 2)
+    assert len(claims_versions) == 1
@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.denylist import ExpiringDenylist
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "ttl, elapsed, is_denied",
+    [
+        (10, 0, True),
+        (10, 9, True),
+        (100, 99, True),
+        (-1, 0, False),
+    ]
+)
+def test_expiring_denylist__contains(
+    ttl: int,
+    elapsed: int,
+    is_denied: bool,
+):
+    clock = FakeClock()
+    denylist = ExpiringDenylist(bucket_size=60, clock=clock)
+    denylist.add("jti", clock.now + ttl)
+
+    clock.now += elapsed
+    assert denylist.contains("jti", clock.now - elapsed + ttl) is is_denied
+    assert denylist.contains("other_jti", clock.now - elapsed + ttl) is False
+    assert denylist.contains("jti", clock.now - elapsed + ttl + 60) is False
+
+
+@pytest.mark.parametrize(
+    "elapsed, expected_size",
+    [
+        (0, 5),
+        (59, 5),
+        (120, 3),
+        (300, 0),
+    ]
+)
+def test_expiring_denylist__purge(
+    elapsed: int,
+    expected_size: int,
+):
+    clock = FakeClock(now=960)
+    denylist = ExpiringDenylist(bucket_size=60, clock=clock)
+    for i, ttl in enumerate([30, 70, 150, 160, 250]):
+        denylist.add(f"jti_{i}", clock.now + ttl)
+
+    clock.now += elapsed
+    denylist.purge()
+    assert len(denylist) == expected_size
+    assert denylist.snapshot()["size"] == expected_size
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.executors import MeteredProcessPool, MeteredThreadPool
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "max_workers, tasks_qty",
+    [
+        (1, 4),
+        (2, 8),
+    ]
+)
+async def test_metered_thread_pool(
+    max_workers: int,
+    tasks_qty: int,
+):
+    pool = MeteredThreadPool(max_workers=max_workers)
+    release = threading.Event()
+
+    def blocking_call(value: int) -> int:
+        release.wait(timeout=5)
+        return value * 2
+
+    tasks = [
+        asyncio.create_task(pool.run(blocking_call, i))
+        for i in range(tasks_qty)
+    ]
+    await asyncio.sleep(0.1)
+
+    stats = pool.stats.snapshot()
+    assert stats["in_flight"] == max_workers
+    assert stats["queue_depth"] == tasks_qty - max_workers
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert results == [i * 2 for i in range(tasks_qty)]
+
+    stats = pool.stats.snapshot()
+    assert stats["completed"] == tasks_qty
+    assert stats["queue_depth"] == 0
+    assert stats["max_queue_depth"] == tasks_qty - max_workers
+    assert stats["max_wait_time"] > 0
+
+    pool.shutdown()
+    assert await pool.run(blocking_call, 5) == 10
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "max_workers, tasks_qty",
+    [
+        (2, 6),
+    ]
+)
+async def test_metered_process_pool(
+    max_workers: int,
+    tasks_qty: int,
+):
+    pool = MeteredProcessPool(max_workers=max_workers)
+    results = await asyncio.gather(
+        *(pool.run(pow, i, 2) for i in range(tasks_qty))
+    )
+    assert results == [i ** 2 for i in range(tasks_qty)]
+
+    with pytest.raises(ValueError):
+        await pool.run(int, "not a number")
+
+    stats = pool.stats.snapshot()
+    assert stats["completed"] == tasks_qty + 1
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert 0 <= stats["utilisation"] <= 1
+    pool.shutdown()
@@ -0,0 +1,193 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import AuthScheduler
+from app.core.scheduler import Histogram, PriorityScheduler, WorkClass
+from app.services.auth_service import build_auth_scheduler
+
+
+def make_scheduler(
+    max_concurrency: int,
+    password_hash_quota: int,
+    token_mint_quota: int | None = None,
+) -> PriorityScheduler:
+    return PriorityScheduler(
+        max_concurrency=max_concurrency,
+        quotas={
+            WorkClass.TOKEN_VERIFY: max_concurrency,
+            WorkClass.TOKEN_MINT: token_mint_quota or max_concurrency - 1,
+            WorkClass.PASSWORD_HASH: password_hash_quota,
+        },
+        queue_time_buckets=[0.01, 0.1, 1],
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "submitted, expected_order",
+    [
+        (
+            [
+                WorkClass.PASSWORD_HASH,
+                WorkClass.TOKEN_MINT,
+                WorkClass.TOKEN_VERIFY,
+            ],
+            [
+                WorkClass.TOKEN_VERIFY,
+                WorkClass.TOKEN_MINT,
+                WorkClass.PASSWORD_HASH,
+            ],
+        ),
+        (
+            [
+                WorkClass.TOKEN_MINT,
+                WorkClass.PASSWORD_HASH,
+                WorkClass.TOKEN_MINT,
+            ],
+            [
+                WorkClass.TOKEN_MINT,
+                WorkClass.TOKEN_MINT,
+                WorkClass.PASSWORD_HASH,
+            ],
+        ),
+    ]
+)
+async def test_priority_scheduler__order(
+    submitted: list[WorkClass],
+    expected_order: list[WorkClass],
+):
+    scheduler = make_scheduler(max_concurrency=2, password_hash_quota=1)
+    started: list[WorkClass] = []
+
+    async def work(work_class: WorkClass) -> None:
+        async with scheduler.slot(work_class):
+            started.append(work_class)
+
+    for _ in range(2):
+        await scheduler.acquire(WorkClass.TOKEN_VERIFY)
+    tasks = []
+    for work_class in submitted:
+        tasks.append(asyncio.create_task(work(work_class)))
+        await asyncio.sleep(0)
+    scheduler.release(WorkClass.TOKEN_VERIFY)
+    await asyncio.gather(*tasks)
+    scheduler.release(WorkClass.TOKEN_VERIFY)
+
+    assert started == expected_order
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.parametrize(
+    "max_concurrency, password_hash_quota, token_mint_quota",
+    [
+        (1, 1, 1),
+        (4, 4, 2),
+        (4, 2, 4),
+    ]
+)
+def test_priority_scheduler__quota_leaves_room(
+    max_concurrency: int,
+    password_hash_quota: int,
+    token_mint_quota: int,
+):
+    with pytest.raises(ValueError):
+        make_scheduler(max_concurrency, password_hash_quota, token_mint_quota)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cpu_count",
+    [
+        None,
+        1,
+    ]
+)
+async def test_priority_scheduler__verify_not_starved_by_hashing(
+    cpu_count: int | None,
+):
+    config = AuthScheduler()
+    if cpu_count is not None:
+        config = AuthScheduler(
+            max_concurrency=cpu_count + 1,
+            token_verify_quota=cpu_count + 1,
+            token_mint_quota=cpu_count,
+            password_hash_quota=max(cpu_count - 1, 1),
+        )
+    scheduler = build_auth_scheduler(config)
+    release = asyncio.Event()
+
+    async def hash_password() -> None:
+        async with scheduler.slot(WorkClass.PASSWORD_HASH):
+            await release.wait()
+
+    hashes = [
+        asyncio.create_task(hash_password())
+        for _ in range(config.max_concurrency * 4)
+    ]
+    await asyncio.sleep(0.01)
+    assert scheduler.snapshot()["password_hash"]["waiting"] > 0
+
+    started = time.monotonic()
+    async with scheduler.slot(WorkClass.TOKEN_VERIFY):
+        assert time.monotonic() - started < 0.01
+
+    release.set()
+    await asyncio.gather(*hashes)
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_priority_scheduler__quota():
+    scheduler = make_scheduler(max_concurrency=2, password_hash_quota=1)
+    release = asyncio.Event()
+
+    async def work(work_class: WorkClass) -> None:
+        async with scheduler.slot(work_class):
+            await release.wait()
+
+    hashes = [
+        asyncio.create_task(work(WorkClass.PASSWORD_HASH)) for _ in range(2)
+    ]
+    await asyncio.sleep(0.01)
+    stats = scheduler.snapshot()
+    assert stats["password_hash"]["in_flight"] == 1
+    assert stats["password_hash"]["waiting"] == 1
+
+    await asyncio.wait_for(scheduler.acquire(WorkClass.TOKEN_VERIFY), 1)
+    scheduler.release(WorkClass.TOKEN_VERIFY)
+
+    cancelled = asyncio.create_task(work(WorkClass.PASSWORD_HASH))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    await asyncio.sleep(0.01)
+    assert scheduler.snapshot()["password_hash"]["waiting"] == 1
+
+    release.set()
+    await asyncio.gather(*hashes)
+    stats = scheduler.snapshot()
+    assert stats["password_hash"]["completed"] == 2
+    assert stats["token_verify"]["completed"] == 1
+    assert stats["password_hash"]["queue_time"]["count"] == 2
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.parametrize(
+    "values, expected_buckets",
+    [
+        ([0.005, 0.05, 0.5, 5], {"0.01": 1, "0.1": 2, "1": 3, "+Inf": 4}),
+        ([], {"0.01": 0, "0.1": 0, "1": 0, "+Inf": 0}),
+    ]
+)
+def test_histogram(
+    values: list[float],
+    expected_buckets: dict[str, int],
+):
+    histogram = Histogram([1, 0.01, 0.1])
+    for value in values:
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == expected_buckets
+    assert snapshot["count"] == len(values)
+    assert snapshot["sum"] == pytest.approx(sum(values))